@@ -1,3 +1,6 @@
+from array import array
+from codeTable import sharedCodes
+from partyLine import NO_LINE
 class Representative(object):
     """
     A single representative in parliament.
@@ -7,27 +10,92 @@ class Representative(object):
     the number of parliaments they've been in government (int), and which parliaments those were (list)
     the number of votes they've been in (int), and what votes those were (list of 3-tuples (Vote Object, how they voted 1/0, party they represented))
     the number of votes where they rebelled (int), and what votes those were (same type as above)
+    the number of votes and rebellions they had in every parliament for every party they were in (dict), kept up to date as votes are added
+
+    To keep the millions of rep-votes small the votes aren't stored as tuples.
+    They're kept in three parallel lists: the Vote objects, an array of how they voted, and an array of party codes from self.codes.
+    self.votes builds the list of 3-tuples from them when it's asked for. The province is stored as a code in the same way
     """
-    def __init__(self, name, constituency, province, country):
+    __slots__ = ("name", "constituency", "country", "codes", "provinceCode", "sessionsInGov", "sessionSet", "numSessionsInGov",
+                 "voteObjects", "yeaNays", "partyCodes", "numVotes", "numRebellions", "rebellionVotes", "parliamentPartyCounts")
+
+    def __init__(self, name, constituency, province, country, codes=None):
         """
         Specify a representative based on their:
             name: str
             constituency: str
             province: str
+            codes: the CodeTable party names and provinces are encoded with (the shared table if not given)
         """
         self.name = name
         self.constituency = constituency
         self.country = country
+        self.codes = codes if codes is not None else sharedCodes
 
         self.province = province
         self.sessionsInGov = []
+        self.sessionSet = set() # same as sessionsInGov, for constant time membership checks
         self.numSessionsInGov = 0
 
-        # self.votes is a list of (vote object, rep's vote (1 for yea, 0 for nay), party )
-        self.votes = []
+        # the votes are stored as parallel lists of (vote object, rep's vote (1 for yea, 0 for nay), party code)
+        self.voteObjects = []
+        self.yeaNays = array("b")
+        self.partyCodes = array("H")
         self.numVotes = 0
         self.numRebellions = 0
         self.rebellionVotes = []
+        # Dict[(parliament #, party), [number of votes, number of rebellions]] in the order they were first seen
+        self.parliamentPartyCounts = {}
+
+    @property
+    def province(self):
+        return self.codes.string(self.provinceCode)
+
+    @province.setter
+    def province(self, province):
+        self.provinceCode = self.codes.code(province)
+
+    @property
+    def votes(self):
+        """ list of (vote object, rep's vote (1 for yea, 0 for nay), party ) for every vote the representative was in
+            built again on every access, so loops should read it once (or use iterVotes)
+        """
+        return list(self.iterVotes())
+
+    def iterVotes(self):
+        """ Same as self.votes, one tuple at a time without building the list
+        """
+        strings = self.codes.strings
+        for vote, yeaNay, partyCode in zip(self.voteObjects, self.yeaNays, self.partyCodes):
+            yield (vote, yeaNay, strings[partyCode])
+
+    def __setstate__(self, state):
+        """ Representatives pickled before Representative had __slots__ are a plain dictionary with a list of vote tuples,
+            and are built again from it with the shared table
+            Representatives pickled before they kept sessionSet and parliamentPartyCounts get them counted again from their votes
+        """
+        if isinstance(state, dict):
+            Representative.__init__(self, state["name"], state["constituency"], state["province"], state["country"])
+            for vote, yeaNay, party in state["votes"]:
+                self.addVote(vote, yeaNay, party)
+            return
+        # otherwise it's (instance dictionary or None, slots)
+        attributes = dict(state[0] or {}, **(state[1] or {}))
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        if not "sessionSet" in attributes:
+            self.sessionSet = set(self.sessionsInGov)
+        if not "parliamentPartyCounts" in attributes:
+            self.parliamentPartyCounts = {}
+            for vote, yeaNay, party in self.iterVotes():
+                counts = self.parliamentPartyCounts.setdefault((vote.voteID[0], party), [0,0])
+                counts[0] += 1
+                counts[1] += self.isRebellion((vote, yeaNay, party))
+
+    def termNumbers(self):
+        """ Return a dictionary with keys of the parliaments the representative was in, and values of which term that was for them (0 for their first term)
+        """
+        return {parliament: term for term, parliament in enumerate(sorted(self.sessionsInGov))}
 
     def __str__(self):
         """ String representation of the representative. Represents their basic information, and what votes they rebelled in
@@ -52,34 +120,71 @@ class Representative(object):
         """
         return self.name == otherRep.name
 
+    def partyResult(self, vote, partyCode):
+        """ Return (num yes, num no) of the party with the given code (in self.codes) in the vote
+        """
+        if vote.codes is self.codes:
+            return vote.partyResult(partyCode)
+        # the vote was encoded with a different table, so go through the party name
+        return vote.partyResult(vote.codes.code(self.codes.string(partyCode)))
+
+    def isRebellionCode(self, vote, yeaNay, partyCode):
+        """ Same as isRebellion, but takes the party as a code in self.codes
+            reads the party's line the vote worked out when it was made (see partyLine.py)
+        """
+        if vote.codes is self.codes:
+            line = vote.partyLine(partyCode)
+        else:
+            line = vote.partyLine(vote.codes.code(self.codes.string(partyCode)))
+        # a party with no line can't be rebelled against
+        return line != NO_LINE and line != yeaNay
+
     def isRebellion(self, voteTuple):
         """Takes in a vote 3-tuple from self.voteList and checks whether it was a rebellion
         """
-        partyVotedYea = 0
-        party = voteTuple[2]
-        # did the party vote yes
-        if voteTuple[0].voteResult[party][0] < voteTuple[0].voteResult[party][1]:
-            partyVotedYea = 1
-        # check if whether the party voted yea is equal to whether the representative voted yea
-        if partyVotedYea == voteTuple[1]:
-            return True
-        else:
-            return False
+        return self.isRebellionCode(voteTuple[0], voteTuple[1], self.codes.code(voteTuple[2]))
 
-    def addVote(self, vote, yeaNay, party):
+    def addVote(self, vote, yeaNay, party, rebellion=None):
         """ Takes in a Vote object, whether the representative voted yea (1 or 0), and what party the representative was in at the time
             Adds it to the vote list, and if it was a rebellion vote it adds it to the the rebellion list
+            rebellion is whether it was a rebellion if that's already known (from a roll call store), otherwise the vote's party line is checked
         """
-        voteTuple = (vote, yeaNay, party)
+        partyCode = self.codes.code(party)
         # append to the big vote list
-        self.votes.append(voteTuple)
+        self.voteObjects.append(vote)
+        self.yeaNays.append(yeaNay)
+        self.partyCodes.append(partyCode)
         self.numVotes += 1
         # if we haven't seen this session they had in government yet then add it
-        if (not vote.voteID[0] in self.sessionsInGov):
-            self.sessionsInGov.append(vote.voteID[0])
+        parliament = vote.voteID[0]
+        if (not parliament in self.sessionSet):
+            self.sessionSet.add(parliament)
+            self.sessionsInGov.append(parliament)
             self.numSessionsInGov += 1
 
+        counts = self.parliamentPartyCounts.get((parliament, party))
+        if counts is None:
+            counts = self.parliamentPartyCounts[(parliament, party)] = [0,0]
+        counts[0] += 1
+
         # if the vote is a rebellion vote
-        if self.isRebellion(voteTuple):
+        if rebellion is None:
+            rebellion = self.isRebellionCode(vote, yeaNay, partyCode)
+        if rebellion:
             self.numRebellions += 1
             self.rebellionVotes.append(vote)
+            counts[1] += 1
+
+    def setRebellions(self, flags):
+        """ Recount the rebellions from flags, whether each of self.votes was a rebellion (see partyLine.classifyRebellions)
+        """
+        self.numRebellions = 0
+        self.rebellionVotes = []
+        for counts in self.parliamentPartyCounts.values():
+            counts[1] = 0
+        strings = self.codes.strings
+        for vote, partyCode, rebellion in zip(self.voteObjects, self.partyCodes, flags):
+            if rebellion:
+                self.numRebellions += 1
+                self.rebellionVotes.append(vote)
+                self.parliamentPartyCounts[(vote.voteID[0], strings[partyCode])][1] += 1
@@ -1,4 +1,8 @@
+from array import array
 from functools import total_ordering
+import numpy as np
+from codeTable import sharedCodes
+from partyLine import partyLines, DEFAULT_TIE, DEFAULT_MIN_VOTERS
 @total_ordering
 class Vote(object):
     """
@@ -9,15 +13,77 @@ class Vote(object):
         This dictionary has keys of the party names, and has values of a two entry list where
         the first entry is how many representatives from that party voted yes,
         and the second entry is how many representatives voted no.
+        To keep votes small the result is stored as a flat array of (party code, num yes, num no) where the
+        party codes come from self.codes, and self.voteResult is built from it when it's asked for.
+    Contains self.lines, the line of every party in the vote (YEA, NAY or NO_LINE from partyLine.py) in the same order as self.results,
+        worked out once when the vote is made so checking for rebellions doesn't have to look at the counts again
     """
-    def __init__(self,voteID, result):
+    __slots__ = ("voteID", "results", "codes", "lines")
+
+    def __init__(self,voteID, result, codes=None, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
         """
         Specify a voteID, and result for a vote where:
             voteID = (parliament #, session #, vote #)
             voteResult = {party: (num yes, num no), ...}
+            codes = the CodeTable party names are encoded with (the shared table if not given)
+            tie and minVoters = the rules the party lines are worked out with (see partyLine.py)
         """
         self.voteID = voteID
-        self.voteResult = result
+        self.codes = codes if codes is not None else sharedCodes
+        self.results = array("i")
+        for party in result:
+            self.results.extend((self.codes.code(party), result[party][0], result[party][1]))
+        self.setLines(tie, minVoters)
+
+    def setLines(self, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+        """ Work out the line of every party in the vote again with the given rules
+        """
+        counts = np.frombuffer(self.results, dtype=np.int32).reshape(-1, 3) if len(self.results) else np.zeros((0, 3), dtype=np.int32)
+        self.lines = array("b", partyLines(counts[:, 1], counts[:, 2], tie, minVoters).tolist())
+
+    @property
+    def voteResult(self):
+        """ {party: [num yes, num no], ...} for every party in the vote
+            built again on every access, so loops should read it once per vote (or use partyResult)
+        """
+        results = self.results
+        strings = self.codes.strings
+        voteResult = {}
+        for i in range(0, len(results), 3):
+            voteResult[strings[results[i]]] = [results[i+1], results[i+2]]
+        return voteResult
+
+    def partyResult(self, partyCode):
+        """ Return (num yes, num no) of the party with the given code in self.codes
+        """
+        results = self.results
+        for i in range(0, len(results), 3):
+            if results[i] == partyCode:
+                return (results[i+1], results[i+2])
+        raise KeyError(self.codes.string(partyCode) if partyCode < len(self.codes) else partyCode)
+
+    def __setstate__(self, state):
+        """ Votes pickled before Vote had __slots__ are a plain dictionary with a voteResult dictionary, and are encoded again with the shared table
+            Votes pickled before they kept their party lines get them worked out with the default rules when they're loaded
+        """
+        if isinstance(state, dict):
+            Vote.__init__(self, state["voteID"], state["voteResult"])
+            return
+        # otherwise it's (instance dictionary or None, slots)
+        attributes = dict(state[0] or {}, **(state[1] or {}))
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        if not "lines" in attributes:
+            self.setLines()
+
+    def partyLine(self, partyCode):
+        """ Return the line (YEA, NAY or NO_LINE) of the party with the given code in self.codes
+        """
+        results = self.results
+        for i in range(0, len(results), 3):
+            if results[i] == partyCode:
+                return self.lines[i // 3]
+        raise KeyError(self.codes.string(partyCode) if partyCode < len(self.codes) else partyCode)
 
     def __str__(self):
         """ string representation of the vote. Only represents the vote identifier, not the contents
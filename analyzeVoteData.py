@@ -1,15 +1,19 @@
+import io
+import sys
 import json
 import numpy as np
 import pprint
+from contextlib import redirect_stdout
+from inspect import signature
+from multiprocessing import Pool
 from collections import OrderedDict
-import matplotlib.pyplot as plt
-import scipy
-from scipy.stats import linregress
-from scipy.stats import chisquare
-from scipy.stats import binom
-from scipy.stats import fisher_exact
-import math
 from tabulate import tabulate
+import voteMatrix
+from voteMatrix import loadVoteMatrix, pruneRebellionCounts, fitBinomialPruned
+from voteStream import iterVotes
+from resultCache import ResultCache
+from figures import regressionFigure, renderFigures
+from lazyImports import stats
 
 # def auAverageRebellions(voteData):
 #     rebels = np.ndarray((len(voteData)))
@@ -99,7 +103,10 @@ def averageRebellionsPerParliament(voteData):
     return OrderedDict(sorted(result.items(), key=lambda t: t[0]))
 
 
-def regressOnRebPerParliament(voteData):
+def regressOnRebPerParliament(voteData, figures=None):
+    """ Regress the average rebellion rate of each parliament on the parliament number (counted from the first parliament)
+        If figures is a list the scatter plot and regression line are added to it as a FigureSpec (see figures.py)
+    """
     perParliament = averageRebellionsPerParliament(voteData)
     parliamentNumbers = []
     means = []
@@ -108,10 +115,9 @@ def regressOnRebPerParliament(voteData):
         means.append(perParliament[key]["mean"])
     minParliament = min(parliamentNumbers)
     parliamentNumbers = [x-minParliament for x in parliamentNumbers]
-    regress = linregress(parliamentNumbers, means)
-    plt.plot(parliamentNumbers, means, "o")
-    plt.plot(parliamentNumbers, regress[1]+regress[0]*np.array(parliamentNumbers), "r")
-    plt.show()
+    regress = stats.linregress(parliamentNumbers, means)
+    if figures is not None:
+        figures.append(regressionFigure("regressOnRebPerParliament", parliamentNumbers, means, regress, "rebellions per parliament"))
     return regress
 
 def rebPerPartyAndParliament(voteData):
@@ -186,98 +192,46 @@ def distributionOfRebellions(voteData):
 
 
 def binomialMSE(prunedData, p, i):
-    pmf = binom.pmf(np.arange(0,i+1), i, p) * (np.sum(prunedData))
+    pmf = stats.binom.pmf(np.arange(0,i+1), i, p) * (np.sum(prunedData))
     totalSquareError = 0
     for actual, simulated in zip(prunedData, pmf):
         totalSquareError += (actual - simulated) ** 2
 
     return totalSquareError
-    
 
-def fitBinomial(voteData):
+def rebellionCounts(voteData):
+    """ the number of rebellions in every vote
+    """
     numRebellions = []
-    numVoters = []
     for vote in voteData:
         rebels = 0
-        num = 0
         for party in vote:
             if party == "Parliament":
                 continue
-            num += vote[party][0] + vote[party][1]
             rebels += min(vote[party][0], vote[party][1])
-        numVoters.append(num)
         numRebellions.append(rebels)
+    return numRebellions
 
-    numRebellions.sort()
-    
-
-    # chi square test will only work when the values are greater than 5 so we'll prune the data set a touch here
-    prunedData = []
-    greaterThan5 = True
-    i = 0
-    while greaterThan5:
-        theCount = numRebellions.count(i)
-        if theCount <= 5:
-            greaterThan5 = False
-        prunedData.append(theCount)
-        i += 1
-
-
-    n = int(np.mean(numVoters))
-    # idea is to check a bunch of different MSE's and pick the best
-    allErrors = []
-    numTests = 100000
-    for p in range(0,numTests+1):
-        error = binomialMSE(prunedData, p/(numTests), i)
-        allErrors.append((p/(numTests), error))
-    
-    sortedErrors = sorted(allErrors, key = lambda t: t[1])
-    pVals = [x[0] for x in sortedErrors[0:100]]
-    minVals = min(pVals)
-    maxVals = max(pVals)
-    print(minVals, maxVals)
-
-    allErrors = []
-    numTests = 100000
-    for p in np.arange(minVals,maxVals, (maxVals-minVals) /numTests ):
-        error = binomialMSE(prunedData, p, i)
-        allErrors.append((p, error))
-    
-    sortedErrors = sorted(allErrors, key = lambda t: t[1])
-    pVals = [x[0] for x in sortedErrors[0:100]]
-    print(min(pVals), max(pVals))
-    return sortedErrors[0]
+def fitBinomial(voteData, prunedData=None):
+    """ Find the p of the binomial distribution that best fits (least squared error) the number of rebellions per vote
+        prunedData can be passed in if pruneRebellionCounts has already been run on voteData
+        returns (best p, squared error of it)
+    """
+    if prunedData is None:
+        prunedData, i = pruneRebellionCounts(rebellionCounts(voteData))
+    return fitBinomialPruned(prunedData)
 
 
 # check if distribution of rebellions follows a geometric (exponential) distributionn
 def checkIfBinomial(voteData):
-    numRebellions = []
-    for vote in voteData:
-        rebels = 0
-        for party in vote:
-            if party == "Parliament":
-                continue
-            rebels += min(vote[party][0], vote[party][1])
-        numRebellions.append(rebels)
+    # prune the data once and share it with fitBinomial
+    prunedData, i = pruneRebellionCounts(rebellionCounts(voteData))
+    optimalP = fitBinomial(voteData, prunedData)[0]
 
-    numRebellions.sort()
-    optimalP = fitBinomial(voteData)[0]
-
-    # prune the data in the same way as fitBinomial does it
-    prunedData = []
-    greaterThan5 = True
-    i = 0
-    while greaterThan5:
-        theCount = numRebellions.count(i)
-        if theCount <= 5:
-            greaterThan5 = False
-        prunedData.append(theCount)
-        i += 1
-
-    pmf = binom.pmf(np.arange(0,i), i, optimalP) * np.sum(prunedData)
+    pmf = stats.binom.pmf(np.arange(0,i), i, optimalP) * np.sum(prunedData)
     print(pmf)
     print(prunedData)
-    result = chisquare(prunedData, f_exp=pmf)
+    result = stats.chisquare(prunedData, f_exp=pmf)
     print(result)
 
 
@@ -307,105 +261,60 @@ def rebellionsChangeResult(voteData):
 
     return (numChanges, numVotes, numChanges/numVotes) 
 
-def rebellionCorrelation(voteData):
-    parls = {}
-    # first we sort the votes by parliament
-    for vote in voteData:
-        if not vote["Parliament"] in parls:
-            parls[vote["Parliament"]] = []
-        parls[vote["Parliament"]].append(vote)
-
-    for parliament in parls:
-        rebsPerParty = {}
-        for party in parls[parliament][0]:
-            if party == "Parliament":
-                continue
-            if parls[parliament][0][party][0] + parls[parliament][0][party][1] > 5: # if the party has more than 5 reps then count them
-                rebsPerParty[party] = []
-
-        for vote in parls[parliament]:
-            for party in rebsPerParty:
-                try:
-                    rebels = min(vote[party][0], vote[party][1])
-                    total = vote[party][0] + vote[party][1]
-                except:
-                    rebels = 0
-                try:
-                    rebsPerParty[party].append(rebels/total)
-                except:
-                    rebsPerParty[party].append(0)
-
-        for partyA in rebsPerParty:
-            for partyB in rebsPerParty:
-                if partyA == partyB:
-                    continue
-                print(partyA, partyB)
-                print(linregress(rebsPerParty[partyA], rebsPerParty[partyB]))
+def printPartyPairs(pairs, fisher=None):
+    """ Print the regression (and fisher exact test if it's given) of every pair of parties in pairs once
+    """
+    for i, parliament in enumerate(pairs):
+        for a, partyA in enumerate(parliament.parties):
+            for b in range(a + 1, len(parliament.parties)):
+                print(parliament.parliament, partyA, parliament.parties[b])
+                if fisher is not None:
+                    print("fisher exact: odds ratio %s, p %s, fdr adjusted p %s" % (fisher[i].oddsratio[a, b], fisher[i].pvalue[a, b], fisher[i].qvalue[a, b]))
+                print("r %s, p %s, slope %s (%s regressed on %s), slope %s (the other way)" % (parliament.rvalue[a, b], parliament.pvalue[a, b],
+                      parliament.slope[a, b], parliament.parties[b], partyA, parliament.slope[b, a]))
+                print()
 
+def rebellionCorrelation(voteData):
+    """ Regress the rebellion rate of every party against every other party's, per parliament
+        Only the parties with more than 5 reps in the first vote of a parliament are counted, and a party that didn't vote counts as 0
+        returns a list of voteMatrix.PartyPairs, one per parliament, with the results of every pair of parties as arrays
+    """
+    pairs = voteMatrix.rebellionCorrelation(loadVoteMatrix(voteData))
+    printPartyPairs(pairs)
+    return pairs
 
 def binaryRebellionCorrelation(voteData):
-    parls = {}
-    # first we sort the votes by parliament
-    for vote in voteData:
-        if not vote["Parliament"] in parls:
-            parls[vote["Parliament"]] = []
-        parls[vote["Parliament"]].append(vote)
-
-    for parliament in parls:
-        rebsPerParty = {}
-        for party in parls[parliament][0]:
-            if party == "Parliament":
-                continue
-            if parls[parliament][0][party][0] + parls[parliament][0][party][1] > 5: # if the party has more than 5 reps then count them
-                rebsPerParty[party] = []
-
-        for vote in parls[parliament]:
-            for party in rebsPerParty:
-                try:
-                    rebels = min(vote[party][0], vote[party][1])
-                    rebels = 1 if rebels != 0 else 0
-                except:
-                    rebels = 0
-                try:
-                    rebsPerParty[party].append(rebels)
-                except:
-                    rebsPerParty[party].append(0)
-
-        for partyA in rebsPerParty:
-            for partyB in rebsPerParty:
-                if partyA == partyB:
-                    continue
-                print(partyA, partyB)
-                # print(rebsPerParty[partyA], rebsPerParty[partyB])
-                aRebels = rebsPerParty[partyA].count(0)
-                bRebels = rebsPerParty[partyB].count(0)
-
-                aNonRebels = rebsPerParty[partyA].count(1)
-                bNonRebels = rebsPerParty[partyB].count(1)
-
-                fisherMatrix = np.array([[aNonRebels,bNonRebels], [aRebels, bRebels]])
-                print(fisher_exact(fisherMatrix))
-
-                # do a linear regression and a fisher exact test at the same time
-                print(linregress(rebsPerParty[partyA], rebsPerParty[partyB]))
-                print()
+    """ Same as rebellionCorrelation, but with a 1 for every vote anyone in the party rebelled in and a 0 otherwise,
+        and with a fisher exact test of every pair of parties (with false discovery rate adjusted p values) done at the same time
+        returns (list of voteMatrix.PartyPairs, list of voteMatrix.FisherPairs), both one per parliament
+    """
+    matrix = loadVoteMatrix(voteData)
+    pairs = voteMatrix.rebellionCorrelation(matrix, binary=True)
+    fisher = voteMatrix.rebellionFisher(matrix)
+    printPartyPairs(pairs, fisher)
+    return pairs, fisher
 
 def collectPartyNames(voteData):
     partyNames = []
     for vote in voteData:
         for party in vote:
-            if not party in partyNames:
+            if party != "Parliament" and not party in partyNames:
                 partyNames.append(party)
-
+    return partyNames
 
 def partyCorrelation(voteData):
-    partyList = collectPartyNames(voteData)
-    voteTogetherMatrix = np.zeros((len(partyList), len(partyNames)))
+    """ How often every pair of parties voted together: the fraction of the votes where both parties took a side (more yeas or more nays)
+        that they took the same side
+        returns (list of party names, (parties x parties) array voteTogetherMatrix where voteTogetherMatrix[a, b] is that fraction)
+    """
+    partyList, voteTogetherMatrix = voteMatrix.partyCorrelation(loadVoteMatrix(voteData))
+    return partyList, voteTogetherMatrix
 
 
 def savePartyParliamentToFile(path, saveFile):
-    with open(path, "r") as f:
-        outputTable = rebPerPartyAndParliament(json.loads(f.read()))
+    # the votes are streamed from the file into a VoteMatrix, which gives the same table as rebPerPartyAndParliament
+    outputTable = voteMatrix.rebPerPartyAndParliament(loadVoteMatrix(iterVotes(path)))
+    print(tabulate(outputTable[1:], headers=outputTable[0]))
     with open(saveFile, "w") as f:
         for line in outputTable:
             line = ["\""+str(x)+"\"" for x in line]
@@ -442,9 +351,14 @@ def partySize(voteData):
             rebellionPercentage = rebellions / totalRepVotes
             sizeToRebRatio.append((numberOfReps, rebellionPercentage))
 
-    return linregress(sizeToRebRatio)
+    # split into x and y so this doesn't rely on linregress accepting a single (N x 2) argument
+    sizes, rebellionPercentages = zip(*sizeToRebRatio)
+    return stats.linregress(sizes, rebellionPercentages)
     
-def regressOnClosenessOfSession(voteData):
+def regressOnClosenessOfSession(voteData, figures=None):
+    """ Regress how much more each parliament rebelled than regressOnRebPerParliament expects on how close its votes were
+        If figures is a list the scatter plots and regression lines of both regressions are added to it
+    """
     allParliaments = {} # Dict[parliament #, List[margin of victory / number of voters]]
     for vote in voteData:
         parNumber = vote["Parliament"]
@@ -498,7 +412,7 @@ def regressOnClosenessOfSession(voteData):
         rebAverages[par] = averageMargin
 
     # now get the expected number of rebellions in that term
-    regress = regressOnRebPerParliament(voteData)
+    regress = regressOnRebPerParliament(voteData, figures)
     slope, intercept = regress[0], regress[1]
     # when the regression was done it normalized the intercept to be the first parliament
     minParliament = min(rebAverages.keys())
@@ -513,30 +427,142 @@ def regressOnClosenessOfSession(voteData):
         closeness.append(parliamentAverages[parl])
 
 
-    newRegress = linregress(closeness, adjustedRebellions)
-    plt.plot(closeness, adjustedRebellions, "o")
-    plt.plot(closeness, newRegress[1]+newRegress[0]*np.array(closeness), "r")
-    plt.show()
+    newRegress = stats.linregress(closeness, adjustedRebellions)
+    if figures is not None:
+        figures.append(regressionFigure("regressOnClosenessOfSession", closeness, adjustedRebellions, newRegress, "rebellions by closeness of session"))
     return newRegress
 
 
             
 
+# the metrics runMetrics computes by default (functions in voteMatrix.py), in the order they're reported
+REPORT_METRICS = ("averageRebellions", "averageRebellionsPerParty", "averageRebellionsPerParliament", "distributionOfRebellions",
+                  "fitBinomial", "rebellionsChangeResult", "partySize", "regressOnRebPerParliament", "regressOnClosenessOfSession")
+# the averages with bootstrap confidence intervals of the means (see bootstrap.py). They take seconds per country instead of
+# milliseconds, so they're only computed when they're asked for
+BOOTSTRAP_METRICS = ("bootstrapAverageRebellions", "bootstrapAverageRebellionsPerParty", "bootstrapAverageRebellionsPerParliament")
+
+def runMetrics(voteData, metrics=REPORT_METRICS, workers=1):
+    """ Compute every metric in metrics with a single pass over voteData (any iterable of votes, like iterVotes(path)).
+        The votes are read once into a VoteMatrix, the per-vote quantities the metrics share (totals, rebels, margins)
+        are computed once on it, and metrics that build on each other (regressOnClosenessOfSession uses regressOnRebPerParliament) reuse the result
+        workers is the number of processes the metrics that take a workers argument (the bootstrap ones) are run by
+        returns an OrderedDict with keys of the metric names and values of what they returned
+    """
+    matrix = loadVoteMatrix(voteData)
+    results = OrderedDict()
+    for metric in metrics:
+        function = getattr(voteMatrix, metric)
+        arguments = {"workers": workers} if workers > 1 and "workers" in signature(function).parameters else {}
+        results[metric] = matrix.cached(metric, lambda: function(matrix, **arguments))
+    return results
+
 def analyzeVote(voteData):
-    return regressOnClosenessOfSession(voteData)
+    """ The regression of rebellions on the closeness of every session, as it has always been returned. runMetrics gives every metric
+    """
+    return runMetrics(voteData, ("regressOnClosenessOfSession",))["regressOnClosenessOfSession"]
+
+def cachedResults(path, metrics, cache):
+    """ Look up the metrics of the vote summary file at path in cache (a ResultCache, or None for no cache)
+        returns (fingerprint of the file, OrderedDict of the cached results with None for the rest, list of the metrics that weren't cached)
+    """
+    if cache is None:
+        return None, OrderedDict((metric, None) for metric in metrics), list(metrics)
+    fingerprint = cache.fingerprint(path)
+    results = OrderedDict()
+    missing = []
+    for metric in metrics:
+        hit, results[metric] = cache.get(cache.key(fingerprint, "voteMatrix." + metric))
+        if not hit:
+            missing.append(metric)
+    return fingerprint, results, missing
+
+def storeResults(cache, fingerprint, results, computed):
+    """ Put the freshly computed metrics into results, and into cache if there is one
+    """
+    for metric in computed:
+        if cache is not None:
+            cache.put(cache.key(fingerprint, "voteMatrix." + metric), fingerprint, "voteMatrix." + metric, computed[metric])
+        results[metric] = computed[metric]
+
+def cachedMetrics(path, metrics=REPORT_METRICS, cache=None, workers=1):
+    """ runMetrics on the vote summary file at path, with every metric's result kept in cache (a ResultCache) if it's given.
+        The file is only read if some of the metrics aren't already cached for its current contents
+    """
+    fingerprint, results, missing = cachedResults(path, metrics, cache)
+    if missing:
+        storeResults(cache, fingerprint, results, runMetrics(iterVotes(path), missing, workers))
+    if cache is not None:
+        cache.flush()
+    return results
 
-def analyzeVotes(paths):
+def metricsWorker(task):
+    """ runMetrics on the vote summary file of one country in a worker process. task is (path, metrics)
+        Pool workers are daemonic and can't start processes of their own, so the metrics run in a single process here
+        returns (the results, everything the metrics printed) so the output can be printed in order once every country is done
+    """
+    path, metrics = task
+    output = io.StringIO()
+    with redirect_stdout(output):
+        results = runMetrics(iterVotes(path), metrics)
+    return results, output.getvalue()
+
+def analyzeVotes(paths, metrics=REPORT_METRICS, cache=None, workers=1, figureFolder=None):
+    """ Compute the metrics of every country in paths (Dict[country, vote summary file]) and print them
+        With more than one worker and more than one country to compute, the countries are loaded and analyzed at the same time in a
+        process pool, one country per process, and everything is printed once they're all done, in the same order as paths.
+        Otherwise the countries are computed one at a time, and the workers are used by the metrics that can use them (the bootstrap ones).
+        The cache is only read and written by this process
+        If figureFolder is given the regression figures of every country (the regressionFigures metric) are drawn to files in it
+        once all of the computations are done, by the same number of workers
+        returns a dictionary with keys of the countries, in the same order as paths, and values of the results of runMetrics
+    """
+    if figureFolder is not None and not "regressionFigures" in metrics:
+        metrics = tuple(metrics) + ("regressionFigures",)
     data = {}
+    output = {}
+    pending = []
     for country in paths:
-        with open(paths[country]) as f:
-            data[country] = analyzeVote(json.loads(f.read()))
-        pp = pprint.PrettyPrinter(indent=4)
-        print(country)
-        pp.pprint(data[country])
-        print()
+        fingerprint, data[country], missing = cachedResults(paths[country], metrics, cache)
+        output[country] = ""
+        if missing:
+            pending.append((country, fingerprint, (paths[country], missing)))
+
+    # paths can be JSON Lines or json array files, either way the votes are streamed in one at a time
+    if workers > 1 and len(pending) > 1:
+        with Pool(min(workers, len(pending))) as pool:
+            computed = pool.map(metricsWorker, [task for country, fingerprint, task in pending], 1)
+        for (country, fingerprint, task), (results, printed) in zip(pending, computed):
+            storeResults(cache, fingerprint, data[country], results)
+            output[country] = printed
+    else:
+        for country, fingerprint, (path, missing) in pending:
+            storeResults(cache, fingerprint, data[country], runMetrics(iterVotes(path), missing, workers))
+    if cache is not None:
+        cache.flush()
+    for country in data:
+        printCountry(country, output[country], data[country])
+
+    if figureFolder is not None:
+        figures = []
+        for country in data:
+            figures.extend(figure._replace(name=country + "-" + figure.name, title=country + " " + figure.title)
+                           for figure in data[country]["regressionFigures"])
+        for fileName in renderFigures(figures, figureFolder, workers):
+            print("saved", fileName)
 
     return data
 
+def printCountry(country, printed, results):
+    """ Print what the metrics of country printed while they ran, followed by their results
+    """
+    print(printed, end="")
+    pp = pprint.PrettyPrinter(indent=4)
+    print(country)
+    # the figures are drawn instead of printed
+    pp.pprint(OrderedDict((metric, results[metric]) for metric in results if metric != "regressionFigures"))
+    print()
+
 
 if __name__ == "__main__":
     # savePartyParliamentToFile("./voteData/canadaVotes.json", "./canadaOverTime.csv")
@@ -544,7 +570,16 @@ if __name__ == "__main__":
     # savePartyParliamentToFile("./voteData/swissVotes.json", "./swissOverTime.csv")
 
     # analysis = analyzeVotes({"canada" : "./voteData/canadaVotes.json"})
-    analysis = analyzeVotes({"canada" : "./voteData/canadaVotes.json", "US" : "./voteData/houseVotes.json", "switzerland" : "./voteData/swissVotes.json"})
+    # results are cached in ./voteData/.resultCache, clear it with python resultCache.py -i ./voteData/.resultCache
+    # the optional first argument is the number of countries analyzed (and figures drawn) at the same time (default 1)
+    # the optional second argument is a folder to draw the regression figures of every country to
+    # -b anywhere in the arguments adds the bootstrap confidence intervals of the averages (BOOTSTRAP_METRICS), which take much longer
+    metrics = REPORT_METRICS + BOOTSTRAP_METRICS if "-b" in sys.argv else REPORT_METRICS
+    arguments = [argument for argument in sys.argv[1:] if argument != "-b"]
+    workers = int(arguments[0]) if len(arguments) > 0 else 1
+    figureFolder = arguments[1] if len(arguments) > 1 else None
+    analysis = analyzeVotes({"canada" : "./voteData/canadaVotes.json", "US" : "./voteData/houseVotes.json", "switzerland" : "./voteData/swissVotes.json"},
+                            metrics, cache=ResultCache("./voteData/.resultCache"), workers=workers, figureFolder=figureFolder)
 #     for country in analysis:
 #         xList = []
 #         yList = []
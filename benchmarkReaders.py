@@ -0,0 +1,83 @@
+import sys
+import io
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from readCanada import readCanada
+from readUS import readUS
+from readSwitzerland import readSwitzerland
+
+# compares the xmltodict readers against the streaming readers on a folder of vote files
+#   the first argument should be the path of the folder containing the relevant XML files
+#   the second argument should be the name of the country being analyzed
+#   the optional third argument is how many times each reader is timed (default 3)
+
+def readerForCountry(country):
+    """ Return the read* function used for the country, following the same names as retrieveFromFolder
+    """
+    if country.lower() == "switzerland" or country.lower() == "swiss":
+        return readSwitzerland
+    elif country.lower() == "usa" or country.lower() == "us":
+        return readUS
+    elif country.lower() == "canada":
+        return readCanada
+    else:
+        print("please set the second argument to be one of 'switzerland', 'canada', 'USA'")
+        sys.exit(1)
+
+def repSummary(rep):
+    """ Everything that is stored on a Representative, in a form that can be compared with ==
+    """
+    votes = [(vote.voteID, sorted(vote.voteResult.items()), yeaNay, party) for vote, yeaNay, party in rep.votes]
+    return (rep.name, rep.constituency, rep.province, rep.country, rep.numVotes, rep.numRebellions,
+            rep.numSessionsInGov, sorted(rep.sessionsInGov), sorted(votes))
+
+def sameReps(allRepsA, allRepsB):
+    """ Return a list of the representative keys where allRepsA and allRepsB differ. An empty list means both readers produced the same allReps
+    """
+    differences = []
+    for repKey in set(allRepsA) | set(allRepsB):
+        if not repKey in allRepsA or not repKey in allRepsB:
+            differences.append(repKey)
+        elif repSummary(allRepsA[repKey]) != repSummary(allRepsB[repKey]):
+            differences.append(repKey)
+    return differences
+
+def timeReader(reader, path, country, streaming, repeats):
+    """ Run reader on path repeats times, and once more while tracing memory
+        Return (the allReps it produced, fastest time in seconds, peak traced memory in bytes)
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            allReps = reader(path, country, streaming=streaming)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        reader(path, country, streaming=streaming)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return allReps, min(times), peak
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    country = sys.argv[2]
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    reader = readerForCountry(country)
+
+    treeReps, treeTime, treePeak = timeReader(reader, path, country, False, repeats)
+    streamReps, streamTime, streamPeak = timeReader(reader, path, country, True, repeats)
+
+    print("%-10s %10s %14s" % ("parser", "seconds", "peak MiB"))
+    print("%-10s %10.3f %14.1f" % ("xmltodict", treeTime, treePeak / 2**20))
+    print("%-10s %10.3f %14.1f" % ("streaming", streamTime, streamPeak / 2**20))
+    print("speedup: %.2fx" % (treeTime / streamTime))
+
+    differences = sameReps(treeReps, streamReps)
+    if differences:
+        print("%d of %d representatives differ between the two parsers, e.g. %s" % (len(differences), len(treeReps), differences[:5]))
+        sys.exit(1)
+    print("both parsers produced the same %d representatives" % len(treeReps))
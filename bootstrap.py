@@ -0,0 +1,67 @@
+import numpy as np
+from multiprocessing import Pool
+
+# Bootstrap confidence intervals for the mean of per-vote values (rebellion rates).
+# Each replicate resamples the values with replacement, and many replicates are drawn at once as a (replicates x values) index array.
+# The replicates of a group are split into tasks of REPLICATES_PER_TASK, each with its own seed spawned from one SeedSequence,
+# so the results only depend on the seed, never on how many worker processes the tasks were spread over.
+
+REPLICATES_PER_TASK = 1000
+# the most indices drawn at once, which bounds the memory each draw uses
+MAX_DRAW = 1 << 22
+
+def bootstrapTask(task):
+    """ The means of replicates resamples of values, drawn with the generator seeded by seedSequence
+        task is (values, replicates, seedSequence) so it can be sent to a worker process
+    """
+    values, replicates, seedSequence = task
+    rng = np.random.default_rng(seedSequence)
+    means = np.empty(replicates)
+    rows = max(1, MAX_DRAW // len(values))
+    for start in range(0, replicates, rows):
+        draw = min(rows, replicates - start)
+        indices = rng.integers(0, len(values), size=(draw, len(values)))
+        means[start:start+draw] = values[indices].mean(axis=1)
+    return means
+
+def bootstrapMeans(groups, replicates=10000, seed=0, workers=1):
+    """ Bootstrap the mean of every array of values in groups (nan values are dropped first, like nanmean)
+        returns a list with the replicates means of every group, nan for groups with no values
+    """
+    groupSeeds = np.random.SeedSequence(seed).spawn(len(groups))
+    tasks = []
+    taskGroups = []
+    groups = [np.asarray(values, dtype=float) for values in groups]
+    groups = [values[~np.isnan(values)] for values in groups]
+    for i, values in enumerate(groups):
+        if len(values) == 0:
+            continue
+        numTasks = -(-replicates // REPLICATES_PER_TASK)
+        for j, taskSeed in enumerate(groupSeeds[i].spawn(numTasks)):
+            tasks.append((values, min(REPLICATES_PER_TASK, replicates - j * REPLICATES_PER_TASK), taskSeed))
+            taskGroups.append(i)
+
+    if workers > 1 and len(tasks) > 1:
+        with Pool(workers) as pool:
+            results = pool.map(bootstrapTask, tasks)
+    else:
+        results = [bootstrapTask(task) for task in tasks]
+
+    means = [[] for _ in groups]
+    for i, result in zip(taskGroups, results):
+        means[i].append(result)
+    return [np.concatenate(groupMeans) if groupMeans else np.full(replicates, np.nan) for groupMeans in means]
+
+def confidenceIntervals(groups, level=0.95, replicates=10000, seed=0, workers=1):
+    """ The percentile bootstrap confidence interval of the mean of every array of values in groups
+        returns a list of (low, high), one per group, (nan, nan) for groups with no values
+    """
+    tail = (1 - level) / 2 * 100
+    intervals = []
+    for means in bootstrapMeans(groups, replicates, seed, workers):
+        if np.isnan(means).all():
+            intervals.append((np.nan, np.nan))
+        else:
+            low, high = np.percentile(means, [tail, 100 - tail])
+            intervals.append((low, high))
+    return intervals
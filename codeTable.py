@@ -0,0 +1,39 @@
+class CodeTable(object):
+    """
+    Dictionary encoding for the strings that repeat across every vote (party names, provinces)
+    Each distinct string is stored once and given a small integer code that Vote and Representative objects keep instead of the string.
+    Objects that are built together share the same table, and a pickle of them holds a single copy of it
+    """
+    __slots__ = ("strings", "codes")
+
+    def __init__(self):
+        self.strings = [] # code -> string
+        self.codes = {}   # string -> code
+
+    def code(self, string):
+        """ Return the code of string, giving it the next free code if it hasn't been seen before
+        """
+        code = self.codes.get(string)
+        if code is None:
+            code = len(self.strings)
+            self.codes[string] = code
+            self.strings.append(string)
+        return code
+
+    def string(self, code):
+        """ Return the string that has the given code
+        """
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getstate__(self):
+        return self.strings
+
+    def __setstate__(self, strings):
+        self.strings = strings
+        self.codes = {string: code for code, string in enumerate(strings)}
+
+# the table used by every Vote and Representative that isn't given one explicitly
+sharedCodes = CodeTable()
@@ -0,0 +1,60 @@
+import re
+from collections import namedtuple
+from multiprocessing import Pool
+from os import makedirs
+from os.path import join
+
+from lazyImports import matplotlib, plt
+
+# The analysis functions don't draw anything themselves, they describe the figures they want as FigureSpecs.
+# Once every computation is done the figures are drawn to files with matplotlib's non interactive Agg backend,
+# spread over worker processes, so a full report can run unattended without a display.
+
+# a scatter plot of (x, y) with the regression line intercept + slope * x drawn over it, saved as <name>.<format>
+# (with anything but letters, digits, dots and dashes in the name replaced by _)
+FigureSpec = namedtuple("FigureSpec", ["name", "title", "x", "y", "slope", "intercept"])
+
+def regressionFigure(name, x, y, regress, title=""):
+    """ The FigureSpec of the points (x, y) and regress, the result of linregress(x, y)
+    """
+    return FigureSpec(name, title, [float(value) for value in x], [float(value) for value in y], float(regress[0]), float(regress[1]))
+
+def drawFigure(figure, axes):
+    """ Draw figure (a FigureSpec) onto the matplotlib axes
+    """
+    axes.plot(figure.x, figure.y, "o")
+    axes.plot(figure.x, [figure.intercept + figure.slope * x for x in figure.x], "r")
+    axes.set_title(figure.title)
+
+def renderFigure(task):
+    """ Draw one figure to a file with the Agg backend. task is (FigureSpec, folder, format) so it can be sent to a worker process
+        returns the name of the file
+    """
+    figure, folder, fileFormat = task
+    matplotlib.use("Agg")
+
+    fig, axes = plt.subplots()
+    drawFigure(figure, axes)
+    fileName = join(folder, "%s.%s" % (re.sub(r"[^\w.-]+", "_", figure.name), fileFormat))
+    fig.savefig(fileName)
+    plt.close(fig)
+    return fileName
+
+def renderFigures(figures, folder, workers=1, fileFormat="png"):
+    """ Draw every FigureSpec in figures to a file in folder, with workers processes drawing at the same time
+        returns the names of the files, in the same order as figures
+    """
+    makedirs(folder, exist_ok=True)
+    tasks = [(figure, folder, fileFormat) for figure in figures]
+    if workers <= 1 or len(tasks) <= 1:
+        return [renderFigure(task) for task in tasks]
+    with Pool(min(workers, len(tasks))) as pool:
+        return pool.map(renderFigure, tasks, 1)
+
+def showFigures(figures):
+    """ Show every FigureSpec in figures in an interactive window, one after the other, like the analysis functions used to
+    """
+    for figure in figures:
+        fig, axes = plt.subplots()
+        drawFigure(figure, axes)
+        plt.show()
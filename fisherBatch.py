@@ -0,0 +1,83 @@
+import numpy as np
+
+from lazyImports import special
+
+# Fisher exact tests on a whole stack of 2x2 tables at once.
+# Every table's hypergeometric pmf is evaluated over its full support with one shared table of log factorials,
+# instead of calling scipy's fisher_exact (and its hypergeom) once per table. The results match fisher_exact
+# (two sided) to within numerical tolerance.
+
+# a value of the pmf counts as being as extreme as the observed table if it's at most this much (relatively) bigger,
+# so values that are equal apart from rounding are treated as equal
+RELATIVE_TOLERANCE = 1e-7
+
+def logFactorials(n):
+    """ log(k!) for every k from 0 to n
+    """
+    return special.gammaln(np.arange(n + 1) + 1)
+
+def oddsRatios(tables):
+    """ The odds ratio a*d / (b*c) of every table [[a, b], [c, d]] in tables (number of tables x 2 x 2),
+        inf if b*c is 0, and nan if a row or a column of the table is all 0 (the same as fisher_exact)
+    """
+    a, b, c, d = tables[:, 0, 0], tables[:, 0, 1], tables[:, 1, 0], tables[:, 1, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where((b > 0) & (c > 0), (a * d) / (b * c), np.inf)
+    empty = (a + b == 0) | (c + d == 0) | (a + c == 0) | (b + d == 0)
+    ratios[empty] = np.nan
+    return ratios
+
+def fisherExact(tables, batchSize=4096):
+    """ The two sided fisher exact test of every 2x2 table in tables (anything that becomes an int array of shape (number of tables, 2, 2))
+        The tables are done batchSize at a time, each batch as a (tables x largest support) array of pmf values
+        returns (odds ratios, p values), each an array with one value per table
+    """
+    tables = np.asarray(tables, dtype=np.int64).reshape(-1, 2, 2)
+    if np.any(tables < 0):
+        raise ValueError("All values in the tables must be nonnegative.")
+
+    rowTotal = tables[:, 0, 0] + tables[:, 0, 1]
+    columnTotal = tables[:, 0, 0] + tables[:, 1, 0]
+    total = tables.sum(axis=(1, 2))
+    logFact = logFactorials(int(total.max()) if len(tables) else 0)
+
+    pvalues = np.ones(len(tables))
+    for start in range(0, len(tables), batchSize):
+        end = start + batchSize
+        n1, n, N = rowTotal[start:end, np.newaxis], columnTotal[start:end, np.newaxis], total[start:end, np.newaxis]
+        # the top left cell can be anything from low to high with these row and column totals
+        low = np.maximum(0, n1 + n - N)
+        high = np.minimum(n1, n)
+        x = low + np.arange(int((high - low).max()) + 1 if len(n) else 0)[np.newaxis, :]
+        inSupport = x <= high
+        x = np.where(inSupport, x, low)
+
+        def logPmf(k):
+            return (logFact[n] - logFact[k] - logFact[n - k] + logFact[N - n] - logFact[n1 - k] - logFact[N - n - n1 + k]
+                    - logFact[N] + logFact[n1] + logFact[N - n1])
+
+        observed = logPmf(tables[start:end, 0, 0][:, np.newaxis])
+        support = logPmf(x)
+        extreme = inSupport & (support <= observed + np.log1p(RELATIVE_TOLERANCE))
+        pvalues[start:end] = np.where(extreme, np.exp(support), 0).sum(axis=1)
+
+    # a row or a column that's all 0 leaves only one possible table
+    empty = (rowTotal == 0) | (rowTotal == total) | (columnTotal == 0) | (columnTotal == total)
+    pvalues[empty] = 1.0
+    return oddsRatios(tables), np.minimum(pvalues, 1.0)
+
+def benjaminiHochberg(pvalues):
+    """ The Benjamini-Hochberg false discovery rate adjusted p values (q values) of pvalues, in the same order
+        nan p values are left as nan and don't count towards the number of tests
+    """
+    pvalues = np.asarray(pvalues, dtype=float)
+    adjusted = np.full(pvalues.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(pvalues))
+    order = tested[np.argsort(pvalues[tested], kind="stable")]
+    numTests = len(order)
+    if numTests == 0:
+        return adjusted
+    scaled = pvalues[order] * numTests / np.arange(1, numTests + 1)
+    # each q value is the smallest scaled p value at or after its rank
+    adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return adjusted
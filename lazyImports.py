@@ -0,0 +1,28 @@
+from importlib import import_module
+
+# The heavy libraries the analyses use, each imported the first time something in it is used instead of when the analysis
+# modules are imported, so the command line tools start quickly (see startupBenchmark.py). Every module gets them from here:
+#   from lazyImports import stats
+#   stats.linregress(x, y)
+# tabulate, numpy and the standard library are cheap to import, so they're still imported at the top of the modules that use them
+
+class LazyModule(object):
+    """
+    Stands in for the module with the given name, importing it when one of its attributes is first asked for
+    """
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute):
+        # only called for attributes LazyModule doesn't have itself, so self.name and self.module are found normally
+        if self.module is None:
+            self.module = import_module(self.name)
+        return getattr(self.module, attribute)
+
+stats = LazyModule("scipy.stats")
+special = LazyModule("scipy.special")
+sm = LazyModule("statsmodels.api")
+# matplotlib.use has to be called before pyplot is first used for the backend to take effect
+matplotlib = LazyModule("matplotlib")
+plt = LazyModule("matplotlib.pyplot")
@@ -0,0 +1,75 @@
+import sys
+import io
+import tracemalloc
+from contextlib import redirect_stdout
+
+from benchmarkReaders import readerForCountry
+
+# reports how many bytes every rep-vote takes in memory, before and after Vote and Representative were made compact
+#   the first argument should be the path of the folder containing the relevant XML files
+#   the second argument should be the name of the country being analyzed
+
+class LegacyVote(object):
+    """ A Vote laid out the way it used to be: a plain object with a voteResult dictionary keyed by party name
+    """
+    def __init__(self, voteID, voteResult):
+        self.voteID = voteID
+        self.voteResult = voteResult
+
+class LegacyRepresentative(object):
+    """ A Representative laid out the way it used to be: a plain object with a list of (Vote, yeaNay, party) tuples
+    """
+    def __init__(self, rep):
+        self.name = rep.name
+        self.constituency = rep.constituency
+        self.country = rep.country
+        self.province = rep.province
+        self.sessionsInGov = list(rep.sessionsInGov)
+        self.numSessionsInGov = rep.numSessionsInGov
+        self.votes = []
+        self.numVotes = rep.numVotes
+        self.numRebellions = rep.numRebellions
+        self.rebellionVotes = []
+
+def legacyCopy(allReps):
+    """ Rebuild allReps with the old layout
+    """
+    legacyVotes = {}
+    legacyReps = {}
+    for repKey in allReps:
+        rep = allReps[repKey]
+        legacyRep = LegacyRepresentative(rep)
+        for vote, yeaNay, party in rep.votes:
+            if not vote.voteID in legacyVotes:
+                legacyVotes[vote.voteID] = LegacyVote(vote.voteID, {p: list(result) for p, result in vote.voteResult.items()})
+            legacyRep.votes.append((legacyVotes[vote.voteID], yeaNay, party))
+        for vote in rep.rebellionVotes:
+            legacyRep.rebellionVotes.append(legacyVotes[vote.voteID])
+        legacyReps[repKey] = legacyRep
+    return legacyReps
+
+def tracedSize(build):
+    """ Return (what build() returned, the number of bytes still allocated by it once it's done)
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, size
+
+if __name__ == "__main__":
+    reader = readerForCountry(sys.argv[2])
+
+    def readCompact():
+        with redirect_stdout(io.StringIO()):
+            return reader(sys.argv[1], sys.argv[2], streaming=True)
+
+    allReps, compactSize = tracedSize(readCompact)
+    legacyReps, legacySize = tracedSize(lambda: legacyCopy(allReps))
+    numRepVotes = sum(allReps[rep].numVotes for rep in allReps)
+
+    print("%d representatives, %d rep-votes" % (len(allReps), numRepVotes))
+    print("%-10s %14s %18s" % ("layout", "MiB", "bytes per rep-vote"))
+    print("%-10s %14.1f %18.1f" % ("before", legacySize / 2**20, legacySize / numRepVotes))
+    print("%-10s %14.1f %18.1f" % ("after", compactSize / 2**20, compactSize / numRepVotes))
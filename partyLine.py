@@ -0,0 +1,94 @@
+import numpy as np
+
+# The party line of every party in every vote, and the rebellions against it, worked out for whole arrays at once.
+# A party's line is the side most of its members voted on. The rules for when that isn't clear are configurable:
+#   tie is the line of a party whose members split evenly: "yea", "nay", or "none" for no line at all
+#   minVoters is how many of the party's members have to vote for it to have a line, so a party whose members mostly
+#   abstained (or that only has one or two members in the room) doesn't set one
+# A rep-vote is a rebellion when the representative voted against their party's line. Votes where the party had no line
+# are never rebellions.
+# The defaults are the rules Representative has always used: a tie is a yea line, and every party in the vote has a line,
+# even one recorded with none of its members voting (0 yea, 0 nay, say a party of paired members), which is a tie
+
+YEA = 1
+NAY = 0
+NO_LINE = -1
+TIE_RULES = ("yea", "nay", "none")
+DEFAULT_TIE = "yea"
+DEFAULT_MIN_VOTERS = 0
+
+def partyLines(yeas, nays, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+    """ The line of every party from how many of its members voted yea and nay (arrays of the same shape)
+        returns an int8 array of the same shape holding YEA, NAY or NO_LINE
+    """
+    if not tie in TIE_RULES:
+        raise ValueError("unknown tie rule %r, it should be one of %s" % (tie, ", ".join(TIE_RULES)))
+    yeas = np.asarray(yeas)
+    nays = np.asarray(nays)
+    tieLine = {"yea": YEA, "nay": NAY, "none": NO_LINE}[tie]
+    lines = np.where(yeas > nays, YEA, np.where(yeas < nays, NAY, tieLine))
+    return np.where(yeas + nays < minVoters, NO_LINE, lines).astype(np.int8)
+
+def rebellions(yeaNays, lines):
+    """ Flag every rep-vote that went against its party's line
+        yeaNays (1 for yea, 0 for nay) and lines (from partyLines) are lined up, one entry per rep-vote
+        returns a bool array
+    """
+    lines = np.asarray(lines)
+    return (lines != NO_LINE) & (np.asarray(yeaNays) != lines)
+
+def lineTable(voteIndex, partyCode, yeas, nays, numVotes, numParties, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+    """ The (votes x parties) table of party lines, from one row per party per vote:
+        the index of the vote, the party's code and how many of its members voted yea and nay
+        Parties that weren't in a vote have NO_LINE in it
+    """
+    table = np.full((numVotes, numParties), NO_LINE, dtype=np.int8)
+    table[voteIndex, partyCode] = partyLines(yeas, nays, tie, minVoters)
+    return table
+
+def classifyRebellions(allReps, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+    """ Label every rep-vote in allReps (a dictionary with values of Representative objects) as a rebellion or not in one pass:
+        the line table is built once from every vote's result, and every rep-vote is looked up in it at once
+        returns a dictionary with keys of the representatives and values of bool arrays lined up with rep.votes
+    """
+    votes = {}   # Dict[voteID, vote index]
+    parties = {} # Dict[party, code]
+    def partyCode(party):
+        if not party in parties:
+            parties[party] = len(parties)
+        return parties[party]
+
+    resultVote, resultParty, resultCounts = [], [], []
+    repVotes, repParties, yeaNays, offsets = [], [], [], [0]
+    for repKey in allReps:
+        for vote, yeaNay, party in allReps[repKey].votes:
+            if not vote.voteID in votes:
+                votes[vote.voteID] = len(votes)
+                for name, counts in vote.voteResult.items():
+                    resultVote.append(votes[vote.voteID])
+                    resultParty.append(partyCode(name))
+                    resultCounts.append(counts)
+            repVotes.append(votes[vote.voteID])
+            repParties.append(partyCode(party))
+            yeaNays.append(yeaNay)
+        offsets.append(len(repVotes))
+
+    resultCounts = np.array(resultCounts, dtype=np.int64).reshape(-1, 2)
+    table = lineTable(resultVote, resultParty, resultCounts[:, 0], resultCounts[:, 1], len(votes), len(parties), tie, minVoters)
+    flags = rebellions(yeaNays, table[repVotes, repParties])
+    return {repKey: flags[offsets[i]:offsets[i+1]] for i, repKey in enumerate(allReps)}
+
+def relabelRebellions(allReps, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+    """ Recount the rebellions of every representative in allReps (a dictionary with values of Representative objects)
+        under the given rules, so every analysis that reads them uses those rules
+        The lines kept in the Vote objects are worked out again with the same rules
+    """
+    flags = classifyRebellions(allReps, tie, minVoters)
+    seen = set()
+    for repKey in allReps:
+        rep = allReps[repKey]
+        rep.setRebellions(flags[repKey])
+        for vote in rep.voteObjects:
+            if not vote.voteID in seen:
+                seen.add(vote.voteID)
+                vote.setLines(tie, minVoters)
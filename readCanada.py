@@ -5,10 +5,12 @@ except Exception as e:
     sys.exit(1)
 
 from typing import List
-from os import listdir
-from os.path import join
 from Representative import Representative
-from Vote import Vote
+from readFolder import ParsedVote, readFolder, streamElements, childText
+
+# the fields of a VoteParticipant that are used when reading a vote
+CANADA_FIELDS = ("Name", "ConstituencyName", "Province", "PartyName", "Yea", "Nay")
+
 def analyzeVotes(voteDict):
     """ takes in the processed xml gotten from the vote file
         returns a dictionary with keys of parties, and values of 2-tuple where first value is number of yea votes, and second value is number of nay votes
@@ -30,40 +32,34 @@ def analyzeVotes(voteDict):
             allParties[party][1] = noVotes + 1
     return allParties
 
-def readCanada(path: str, country: str) -> List[Representative]:
-    """ retreive all of the relevant xml files.
-        Generate all the relevant Vote objects as well as the relevant Representative objects
-        Return a dictionary with keys of the representative's name, and values of Representative objects
+def parseCanadaFile(voteFile: str, streaming: bool = False) -> ParsedVote:
+    """ Parse a single vote file into a ParsedVote.
+        With streaming the xml is read incrementally and only the fields used below are kept, otherwise the whole file is parsed with xmltodict
     """
-    # get the full list of file names that contain the relevante xml files
-    fileNames = listdir(path)
-    cleanFileNames = []
-    for file in fileNames: 
-        fullFileNames = join(path, file)
-        cleanFileNames.append(fullFileNames)
-
-    allReps = {}
-    for voteFile in cleanFileNames:
+    if streaming:
+        allVotesList = []
+        for participant in streamElements(voteFile, {"VoteParticipant"}):
+            allVotesList.append(childText(participant, CANADA_FIELDS))
+    else:
         with open(voteFile) as f:
             # open the file, and parse the xml in it
-            print(voteFile)
             resultDict = xmltodict.parse(f.read())
         allVotesList = resultDict["List"]["VoteParticipant"]
-        voteMetaData = voteFile.split("/")[-1][:-4].split("_") # gets the meta data of the vote from the file name
-        voteMetaData = (int(voteMetaData[0]), int(voteMetaData[1]), int(voteMetaData[2]))
-        
-        # turn the xml into a summarized dictionary
-        voteSummary = analyzeVotes(allVotesList)
-        voteOb = Vote(voteMetaData, voteSummary)
+    voteMetaData = voteFile.split("/")[-1][:-4].split("_") # gets the meta data of the vote from the file name
+    voteMetaData = (int(voteMetaData[0]), int(voteMetaData[1]), int(voteMetaData[2]))
 
-        # for every representative in the vote, add the vote object to their list of votes
-        for voterRecord in allVotesList:
-            currentRepName = voterRecord["Name"]
-            if not currentRepName in allReps:
-                # if the representative isn't yet in the all reps dictionary, create it and then add it to the dictionary
-                newRep = Representative(voterRecord["Name"], voterRecord["ConstituencyName"], voterRecord["Province"], country)
-                allReps[currentRepName] = newRep
+    # turn the xml into a summarized dictionary
+    voteSummary = analyzeVotes(allVotesList)
 
-            rep = allReps[currentRepName]
-            rep.addVote(voteOb, int(voterRecord["Yea"]), voterRecord["PartyName"])
-    return allReps
+    # record how every representative in the vote voted
+    participants = []
+    for voterRecord in allVotesList:
+        participants.append((voterRecord["Name"], voterRecord["Name"], voterRecord["ConstituencyName"], voterRecord["Province"], int(voterRecord["Yea"]), voterRecord["PartyName"]))
+    return ParsedVote(voteMetaData, voteSummary, participants, voteMetaData[0])
+
+def readCanada(path: str, country: str, streaming: bool = False, workers: int = 1, manifestFile: str = None, voteSummaries: list = None, allReps: dict = None) -> List[Representative]:
+    """ retreive all of the relevant xml files.
+        Generate all the relevant Vote objects as well as the relevant Representative objects
+        Return a dictionary with keys of the representative's name, and values of Representative objects
+    """
+    return readFolder(path, parseCanadaFile, country, streaming, workers, manifestFile, voteSummaries, allReps)
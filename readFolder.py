@@ -0,0 +1,297 @@
+from collections import namedtuple
+from functools import partial
+from hashlib import sha256
+from multiprocessing import Pool
+from os import listdir, replace, stat
+from os.path import join, isfile
+from pickle import dump, load
+from sys import intern
+from xml.etree.ElementTree import iterparse
+from Representative import Representative
+from codeTable import CodeTable
+from Vote import Vote
+
+# A single vote file reduced to what the readers use.
+#   voteID is the (parliament #, session #, vote #) tuple given to the Vote object
+#   voteSummary is the {party: (num yes, num no)} dictionary given to the Vote object
+#   participants is a list of (rep key, name, constituency, province, rep's vote (1 for yea, 0 for nay), party)
+#   parliament is what the vote is grouped by in the party summaries read by analyzeVoteData.py
+#     (the parliament/congress number, or the year for Switzerland) or None if the file doesn't say
+ParsedVote = namedtuple("ParsedVote", ["voteID", "voteSummary", "participants", "parliament"])
+
+def voteFiles(path):
+    """ Return the full path of every file in the folder at path, sorted so that votes are always read in the same order
+    """
+    cleanFileNames = []
+    for file in sorted(listdir(path)):
+        cleanFileNames.append(join(path, file))
+    return cleanFileNames
+
+def localName(tag):
+    """ Strip the namespace from an ElementTree tag. "{http://...}properties" becomes "properties"
+    """
+    return tag.rsplit("}", 1)[-1]
+
+def childText(element, fields):
+    """ Return a dictionary with keys of the (namespace free) names in fields, and values of the text of the matching children of element.
+        Missing or empty children have a value of None, the same way xmltodict treats them
+    """
+    record = dict.fromkeys(fields)
+    for child in element:
+        name = localName(child.tag)
+        if name in record:
+            text = child.text.strip() if child.text is not None else ""
+            record[name] = text if text != "" else None
+    return record
+
+def streamElements(voteFile, tags):
+    """ Incrementally parse the xml in voteFile, yielding every element whose (namespace free) tag is in tags once it has been fully read.
+        Elements are thrown away as soon as they've been handled, so the full document tree is never built
+    """
+    root = None
+    depth = 0
+    for event, element in iterparse(voteFile, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if localName(element.tag) in tags:
+            yield element
+            element.clear()
+        # once a direct child of the root is finished nothing will reference it again
+        if depth == 1:
+            root.clear()
+
+def partySummary(parsedVote):
+    """ Return the party level summary of parsedVote in the same format the getVoteData scripts save for analyzeVoteData.py:
+        {"Parliament": parliament, party: [num yes, num no], ...}
+    """
+    summary = {"Parliament": parsedVote.parliament}
+    for party in parsedVote.voteSummary:
+        summary[party] = list(parsedVote.voteSummary[party])
+    return summary
+
+def internText(value):
+    """ Intern value if it's a string. Anything else (None for an empty field, or a non string rep key) is returned as it is
+    """
+    return intern(value) if isinstance(value, str) else value
+
+def addParsedVote(allReps, parsedVote, country, codes=None):
+    """ Create the Vote object for parsedVote, and add it to every participating representative in allReps.
+        Representatives that haven't been seen before are created and added to allReps
+        Party names and provinces are encoded with codes (the shared table if not given)
+        Strings are interned so that equal strings are the same object no matter which process parsed them,
+        which keeps the pickled allReps identical for any number of workers
+        Fields that were empty in the file are None, and are kept as they are
+    """
+    voteSummary = {internText(party): result for party, result in parsedVote.voteSummary.items()}
+    voteOb = Vote(parsedVote.voteID, voteSummary, codes)
+    for repKey, name, constituency, province, yeaNay, party in parsedVote.participants:
+        repKey = internText(repKey)
+        if not repKey in allReps:
+            allReps[repKey] = Representative(internText(name), internText(constituency), internText(province), country, codes)
+        allReps[repKey].addVote(voteOb, yeaNay, internText(party))
+
+def parseFiles(fileNames, parseFile, streaming=False, workers=1):
+    """ Parse every file in fileNames with parseFile, yielding (file name, ParsedVote) in the same order as fileNames.
+        With more than one worker the files are split into shards and parsed in a process pool,
+        but the results still come back in file order so the merge doesn't depend on the number of workers
+    """
+    if workers <= 1 or len(fileNames) <= 1:
+        for voteFile in fileNames:
+            yield voteFile, parseFile(voteFile, streaming)
+        return
+
+    # a few shards per worker keeps them all busy without paying for a round trip per file
+    shardSize = max(1, len(fileNames) // (workers * 4))
+    with Pool(workers) as pool:
+        for voteFile, parsedVote in zip(fileNames, pool.imap(partial(parseFile, streaming=streaming), fileNames, shardSize)):
+            yield voteFile, parsedVote
+
+# The manifest remembers every file that went into a dataset so a rebuild only has to parse new or changed files,
+# and merge them into the dataset saved with it. It is a pickled dictionary of:
+#   "version": MANIFEST_VERSION, bumped whenever ManifestEntry changes so that old manifests are thrown away
+#   "parser": the name of the parse*File function that read the files
+#   "numReps" and "numRepVotes": the size of the dataset the manifest was saved with. A dataset that doesn't match
+#   (say the save was interrupted between writing the manifest and the dataset) is read again from scratch
+#   "files": Dict[file name, ManifestEntry]
+MANIFEST_VERSION = 3
+# Only what identifies a file and the vote it held is kept, the votes themselves are in the dataset.
+# voteID and parliament are those of the file's ParsedVote, or None if it didn't hold a vote
+ManifestEntry = namedtuple("ManifestEntry", ["size", "mtime", "hash", "voteID", "parliament"])
+
+def fileHash(voteFile):
+    """ Return the sha256 hex digest of the contents of voteFile
+    """
+    digest = sha256()
+    with open(voteFile, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def datasetSize(allReps):
+    """ Return (number of representatives, number of rep-votes) in allReps, what a manifest checks its dataset against
+    """
+    return len(allReps), sum(allReps[repKey].numVotes for repKey in allReps)
+
+def loadManifest(manifestFile, parseFile, allReps):
+    """ Return the files recorded in manifestFile, or an empty dictionary if there is no usable manifest for allReps
+    """
+    if not isfile(manifestFile):
+        return {}
+    with open(manifestFile, "rb") as f:
+        manifest = load(f)
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("parser") != parseFile.__name__:
+        return {}
+    if (manifest["numReps"], manifest["numRepVotes"]) != datasetSize(allReps):
+        return {}
+    return manifest["files"]
+
+def saveManifest(manifestFile, parseFile, files, allReps):
+    """ Write files to manifestFile, along with the size of allReps. The manifest is written to a temporary file first so an interrupted save can't corrupt it
+    """
+    numReps, numRepVotes = datasetSize(allReps)
+    tempFile = manifestFile + ".tmp"
+    with open(tempFile, "wb") as f:
+        dump({"version": MANIFEST_VERSION, "parser": parseFile.__name__, "numReps": numReps, "numRepVotes": numRepVotes, "files": files}, f)
+    replace(tempFile, manifestFile)
+
+def updateManifest(fileNames, oldFiles):
+    """ Compare fileNames against the manifest entries in oldFiles.
+        Files whose size and modification time haven't changed are trusted, files where only the modification time changed are hashed,
+        and only files that are new or whose contents changed have to be parsed.
+        Return (the manifest entries in the same order as fileNames, with a voteID of None for the files to parse,
+                the files to parse in the same order as fileNames,
+                the voteIDs of the votes read from files that changed or are gone)
+    """
+    newFiles = {}
+    toParse = []
+    for voteFile in fileNames:
+        fileStat = stat(voteFile)
+        entry = oldFiles.get(voteFile)
+        if entry is not None and entry.size == fileStat.st_size and entry.mtime == fileStat.st_mtime_ns:
+            newFiles[voteFile] = entry
+            continue
+
+        contentHash = fileHash(voteFile)
+        if entry is not None and entry.hash == contentHash:
+            newFiles[voteFile] = entry._replace(size=fileStat.st_size, mtime=fileStat.st_mtime_ns)
+        else:
+            newFiles[voteFile] = ManifestEntry(fileStat.st_size, fileStat.st_mtime_ns, contentHash, None, None)
+            toParse.append(voteFile)
+
+    parsing = set(toParse)
+    staleVotes = {entry.voteID for voteFile, entry in oldFiles.items()
+                  if entry.voteID is not None and (voteFile in parsing or not voteFile in newFiles)}
+    return newFiles, toParse, staleVotes
+
+def filePositions(files):
+    """ Return a dictionary with keys of the voteID of every file in files (manifest entries in file order) that holds a vote, and values of where the file is in files
+    """
+    return {entry.voteID: i for i, entry in enumerate(files.values()) if entry.voteID is not None}
+
+def movedRepFiles(allReps, files, staleVotes):
+    """ Return the files that aren't being parsed again, but have to be for the merge to know the order of their representatives.
+        The representatives first seen in a file keep the order they had in allReps (see mergeVotes), which is the order they were in that file
+        unless the file they were first seen in changed or is gone. Those representatives are now first seen in a later file,
+        which is read again to find where they are in it
+    """
+    positions = filePositions(files)
+    fileNames = list(files)
+    toParse = set()
+    for repKey in allReps:
+        rep = allReps[repKey]
+        if rep.voteObjects and rep.voteObjects[0].voteID in staleVotes:
+            kept = [positions[vote.voteID] for vote in rep.voteObjects if not vote.voteID in staleVotes and vote.voteID in positions]
+            if kept:
+                toParse.add(fileNames[min(kept)])
+    return toParse
+
+def mergeVotes(allReps, files, parsedVotes, staleVotes, country):
+    """ Return the dataset a full read of every file in files (manifest entries in file order) would give.
+        The votes of allReps, the saved dataset, are kept except the ones with a voteID in staleVotes (which has to include
+        the votes that were read again), and the ones in parsedVotes (Dict[file name, ParsedVote]) are added from the files that were parsed.
+        Everything is added again in file order: every representative's votes, the order of the representatives,
+        and the codes the party names and provinces are given, so the result is the same as reading every file from scratch.
+        Within a file that wasn't parsed again the representatives keep the order they had in allReps
+    """
+    positions = filePositions(files)
+    # Dict[position of the file, (voteID, voteSummary, participants)] with participants the same as in ParsedVote, in file order
+    votes = {}
+    for i, voteFile in enumerate(files):
+        if voteFile in parsedVotes:
+            parsedVote = parsedVotes[voteFile]
+            votes[i] = (parsedVote.voteID, parsedVote.voteSummary, parsedVote.participants)
+    for repKey in allReps:
+        rep = allReps[repKey]
+        for vote, yeaNay, party in rep.iterVotes():
+            i = positions.get(vote.voteID)
+            if vote.voteID in staleVotes or i is None:
+                continue
+            if not i in votes:
+                votes[i] = (vote.voteID, vote.voteResult, [])
+            votes[i][2].append((repKey, rep.name, rep.constituency, rep.province, yeaNay, party))
+
+    # the votes are added with a new code table, the way a fresh process reading every file would encode them
+    codes = CodeTable()
+    merged = {}
+    for i in sorted(votes):
+        voteID, voteSummary, participants = votes[i]
+        addParsedVote(merged, ParsedVote(voteID, voteSummary, participants, None), country, codes)
+    return merged
+
+def readFolder(path, parseFile, country, streaming=False, workers=1, manifestFile=None, voteSummaries=None, allReps=None):
+    """ Parse every vote file in the folder at path with parseFile (one of the parse*File functions in the read* modules)
+        Return a dictionary with keys of the representative's name (or unique tag), and values of Representative objects
+        With a manifestFile and allReps, the dataset that was saved along with it, only new or changed files are parsed.
+        Their votes are merged with the rest of allReps (see mergeVotes), after the votes of the files that changed or are gone are taken out,
+        and the merged dataset is the same as the one parsing every file would give.
+        Without allReps, or if the manifest doesn't match it, every file is parsed again. Either way the manifest is then updated
+        If voteSummaries is a list the party summary of every vote (see partySummary) is appended to it, in file order
+    """
+    if manifestFile is None:
+        allReps = {}
+        for voteFile, parsedVote in parseFiles(voteFiles(path), parseFile, streaming, workers):
+            print(voteFile)
+            if parsedVote is None:
+                continue
+            addParsedVote(allReps, parsedVote, country)
+            if voteSummaries is not None and parsedVote.parliament is not None:
+                voteSummaries.append(partySummary(parsedVote))
+        return allReps
+
+    oldFiles = loadManifest(manifestFile, parseFile, allReps) if allReps is not None else {}
+    if not oldFiles:
+        allReps = {}
+    files, toParse, staleVotes = updateManifest(voteFiles(path), oldFiles)
+    # representatives whose first file changed or is gone are placed by reading the file they're now first seen in again
+    moved = movedRepFiles(allReps, files, staleVotes) - set(toParse)
+    if moved:
+        staleVotes |= {files[voteFile].voteID for voteFile in moved}
+        toParse = [voteFile for voteFile in files if voteFile in moved or voteFile in set(toParse)]
+    parsedVotes = {}
+    for voteFile, parsedVote in parseFiles(toParse, parseFile, streaming, workers):
+        print(voteFile)
+        if parsedVote is not None:
+            parsedVotes[voteFile] = parsedVote
+            files[voteFile] = files[voteFile]._replace(voteID=parsedVote.voteID, parliament=parsedVote.parliament)
+    print("parsed %d new or changed files, reused %d from %s" % (len(toParse), len(files) - len(toParse), manifestFile))
+
+    if parsedVotes or staleVotes:
+        # a vote that's read again replaces the copy already in the dataset
+        allReps = mergeVotes(allReps, files, parsedVotes, staleVotes | {parsedVote.voteID for parsedVote in parsedVotes.values()}, country)
+
+    if voteSummaries is not None:
+        # the votes that weren't parsed again are summarized from the dataset
+        allVotes = {vote.voteID: vote for repKey in allReps for vote in allReps[repKey].voteObjects} if len(parsedVotes) < len(files) else {}
+        for voteFile, entry in files.items():
+            if voteFile in parsedVotes:
+                if entry.parliament is not None:
+                    voteSummaries.append(partySummary(parsedVotes[voteFile]))
+            elif entry.voteID is not None and entry.parliament is not None:
+                voteSummaries.append(partySummary(ParsedVote(entry.voteID, allVotes[entry.voteID].voteResult, [], entry.parliament)))
+    saveManifest(manifestFile, parseFile, files, allReps)
+    return allReps
@@ -1,79 +1,98 @@
 from typing import List
 from Representative import Representative
-from Vote import Vote
+from readFolder import ParsedVote, readFolder, streamElements, childText
 from sys import exit
-from os.path import join
-from os import listdir
+from xml.etree.ElementTree import ParseError
+from xml.parsers.expat import ExpatError
 try:
     import xmltodict
 except Exception as e:
     print("xmltodict not installed, exiting")
     exit(1)
 
-def analyzeVotes(voteXML):
+# the fields of an entry's m:properties that are used when reading a vote
+SWISS_FIELDS = ("IdVote", "IdSession", "VoteEnd", "PersonNumber", "FirstName", "LastName", "CantonName", "ParlGroupName", "Decision")
+
+def analyzeVotes(voteRecords):
+    """ takes in the vote records of every representative in a vote (see SWISS_FIELDS)
+        returns a dictionary with keys of parliamentary groups, and values of 2-list where first value is number of yea votes, and second value is number of nay votes
+    """
     allParties = {}
-    for representativeXML in voteXML:
-        rep = representativeXML["content"]["m:properties"]
-        party = rep["d:ParlGroupName"]
+    for rep in voteRecords:
+        party = rep["ParlGroupName"]
         if not party in allParties:
             allParties[party] = [0,0]
-        vote = int(rep["d:Decision"]["#text"])
+        vote = int(rep["Decision"])
         if vote == 1:
             allParties[party][0] += 1
         elif vote == 2:
             allParties[party][1] += 1
     return allParties
-        
-
-def readSwitzerland(path: str, country: str) -> List[Representative]:
-    fileNames = listdir(path)
-    cleanFileNames = []
-    for file in fileNames: 
-        fullFileNames = join(path, file)
-        cleanFileNames.append(fullFileNames)
-    
-    allReps = {}
-    for voteFile in cleanFileNames:
-        with open(voteFile) as f:
-            print(voteFile)
-            try:
-                voteXML = xmltodict.parse(f.read())
-            except:
-                continue
 
-        metaData = voteXML["feed"]["entry"][0]["content"]["m:properties"]
-        voteNumber = int(metaData["d:IdVote"]["#text"])
-        try:
-            voteSession = metaData["d:IdSession"]["#text"]
-        except:
-            continue
-        sessionNumber = int(voteSession[2:4])
-        parNumber = int(voteSession[0:2])
-        metaDataTuple = (parNumber, sessionNumber, voteNumber)
-        voteSummary = analyzeVotes(voteXML["feed"]["entry"])
+def entryText(value):
+    """ xmltodict gives typed fields as {"@m:type": ..., "#text": ...}, untyped fields as plain strings, and null fields without a "#text"
+        Return the text of the field in every case, or None when it's null
+    """
+    if isinstance(value, dict):
+        return value.get("#text")
+    return value
 
-        voteOb = Vote(metaDataTuple, voteSummary)
+def parseSwitzerlandFile(voteFile: str, streaming: bool = False) -> ParsedVote:
+    """ Parse a single vote file into a ParsedVote, or None if the file isn't well formed xml, has no entries, or doesn't have a session.
+        With streaming the xml is read incrementally and only the fields in SWISS_FIELDS are kept, otherwise the whole file is parsed with xmltodict
+    """
+    try:
+        if streaming:
+            voteRecords = [childText(properties, SWISS_FIELDS) for properties in streamElements(voteFile, {"properties"})]
+        else:
+            with open(voteFile) as f:
+                # a feed with a single entry is still a list of entries, the same as streaming gives
+                voteXML = xmltodict.parse(f.read(), force_list=("entry",))
+            # an empty feed is None, and a feed without entries has no "entry"
+            feed = voteXML["feed"] or {}
+            voteRecords = []
+            for repXML in feed.get("entry", []):
+                properties = repXML["content"]["m:properties"]
+                voteRecords.append({field: entryText(properties.get("d:" + field)) for field in SWISS_FIELDS})
+    except (ParseError, ExpatError, KeyError) as e:
+        print("skipping %s, it couldn't be read: %s: %s" % (voteFile, type(e).__name__, e))
+        return None
+    if len(voteRecords) == 0:
+        print("skipping %s, it has no entries" % voteFile)
+        return None
 
-        for repXML in voteXML["feed"]["entry"]:
-            rep = repXML["content"]["m:properties"]
-            name = int(rep["d:PersonNumber"]["#text"])
-            party = rep["d:ParlGroupName"]
-            voteContent = int(rep["d:Decision"]["#text"])
-            if voteContent == 1:
-                vote = 1
-            elif voteContent == 2:
-                vote = 0
-            else:
-                continue
+    metaData = voteRecords[0]
+    voteNumber = int(metaData["IdVote"])
+    voteSession = metaData["IdSession"]
+    if voteSession is None:
+        return None
+    sessionNumber = int(voteSession[2:4])
+    parNumber = int(voteSession[0:2])
+    metaDataTuple = (parNumber, sessionNumber, voteNumber)
+    # the party summaries group Swiss votes by the year they ended in, like swissAnalyzeXML.py does
+    year = int(metaData["VoteEnd"].split("-")[0]) if metaData["VoteEnd"] is not None else None
+    voteSummary = analyzeVotes(voteRecords)
 
-            if not name in allReps:
-                realName = rep["d:FirstName"] + " " + rep["d:LastName"]
-                canton = rep["d:CantonName"]
-                country = "Switzerland"
-                newRep = Representative(realName, canton, canton, country)
-                allReps[name] = newRep
+    participants = []
+    for rep in voteRecords:
+        name = int(rep["PersonNumber"])
+        party = rep["ParlGroupName"]
+        voteContent = int(rep["Decision"])
+        if voteContent == 1:
+            vote = 1
+        elif voteContent == 2:
+            vote = 0
+        else:
+            continue
 
-            rep = allReps[name]
-            rep.addVote(voteOb, vote, party)
-    return allReps
+        realName = rep["FirstName"] + " " + rep["LastName"]
+        canton = rep["CantonName"]
+        participants.append((name, realName, canton, canton, vote, party))
+    return ParsedVote(metaDataTuple, voteSummary, participants, year)
 
+def readSwitzerland(path: str, country: str, streaming: bool = False, workers: int = 1, manifestFile: str = None, voteSummaries: list = None, allReps: dict = None) -> List[Representative]:
+    """ retreive all of the relevant xml files.
+        Generate all the relevant Vote objects as well as the relevant Representative objects
+        Return a dictionary with keys of the representative's person number, and values of Representative objects
+    """
+    return readFolder(path, parseSwitzerlandFile, "Switzerland", streaming, workers, manifestFile, voteSummaries, allReps)
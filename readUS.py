@@ -1,8 +1,6 @@
 from typing import List
 from Representative import Representative
-from Vote import Vote
-from os.path import join
-from os import listdir
+from readFolder import ParsedVote, readFolder, streamElements, childText, localName
 from sys import exit
 try:
     from xmltodict import parse
@@ -10,62 +8,89 @@ except Exception as e:
     print("xmltodict not installed, exiting")
     exit(1)
 
-def readUS(path: str, country: str) -> List[Representative]:
-    """ retreive all of the relevant xml files.
-        Generate all the relevant Vote objects as well as the relevant Representative objects
-        Return a dictionary with keys of the representative's name, and values of Representative objects
+def streamUS(voteFile):
+    """ Incrementally parse a roll call file, keeping only the fields parseUSFile uses.
+        Returns the same (vote-metadata, totals-by-party, recorded-vote) values as reading them out of xmltodict would,
+        with None in place of the totals or the recorded votes when they're missing
     """
-    fileNames = listdir(path)
-    cleanFileNames = []
-    for file in fileNames:
-        fullFileNames = join(path, file)
-        cleanFileNames.append(fullFileNames)
+    metaData = None
+    partyData = None
+    fullResult = None
+    for element in streamElements(voteFile, {"vote-metadata", "recorded-vote"}):
+        if localName(element.tag) == "vote-metadata":
+            metaData = childText(element, ("congress", "session", "rollcall-num"))
+            for totals in element.iter():
+                if localName(totals.tag) == "totals-by-party":
+                    if partyData is None:
+                        partyData = []
+                    partyData.append(childText(totals, ("party", "yea-total", "nay-total")))
+        else:
+            if fullResult is None:
+                fullResult = []
+            legislator = None
+            voteContent = None
+            for child in element:
+                if localName(child.tag) == "legislator":
+                    legislator = {"#text": (child.text or "").strip(), "@state": child.get("state"), "@party": child.get("party")}
+                elif localName(child.tag) == "vote":
+                    voteContent = (child.text or "").strip()
+            fullResult.append({"legislator": legislator, "vote": voteContent})
+    return metaData, partyData, fullResult
 
-    allReps = {}
-    for voteFile in cleanFileNames:
+def parseUSFile(voteFile: str, streaming: bool = False) -> ParsedVote:
+    """ Parse a single roll call file into a ParsedVote, or None if the file doesn't contain the needed totals.
+        With streaming the xml is read incrementally and only the fields used below are kept, otherwise the whole file is parsed with xmltodict
+    """
+    if streaming:
+        metaData, partyData, fullResult = streamUS(voteFile)
+    else:
         with open(voteFile) as f:
-            print(voteFile)
-            fullXML = parse(f.read())
+            # a single party total or recorded vote is still a list, the same as streaming gives
+            fullXML = parse(f.read(), force_list=("totals-by-party", "recorded-vote"))
         metaData = fullXML["rollcall-vote"]["vote-metadata"]
-        metaDataTuple = (int(metaData["congress"]), int(metaData["session"][0]), int(metaData["rollcall-num"]))
         try: # for a small amount of votes they don't keep track of totals for this.
              # keeping track of these votes would add uneeded complexity so we instead choose to ignore them
             partyData = metaData["vote-totals"]["totals-by-party"]
-        except:
-            continue
-        voteResult = {}
-        for partyResult in partyData:
-            voteResult[partyResult["party"]] = (int(partyResult["yea-total"]), int(partyResult["nay-total"]))
-        voteOb = Vote(metaDataTuple, voteResult)
-
+        except (KeyError, TypeError): # TypeError when vote-totals is empty
+            partyData = None
         try: # there is a single vote where this line causes a problem
             fullResult = fullXML["rollcall-vote"]["vote-data"]["recorded-vote"]
-        except:
-            continue
-        for representative in fullResult:
-            repID = representative["legislator"]
-            if representative["vote"] == "Yea" or representative["vote"] == "Aye":
-                vote=1
-            elif representative["vote"] == "Nay" or representative["vote"] == "No":
-                vote=0
-            elif representative["vote"] == "Not Voting" or representative["vote"] == "Present":
-                continue
-            else:
-                print(representative["vote"])
-            name = repID["#text"] + " " + repID["@state"]
-            if not name in allReps:
-                newRep = Representative(repID["#text"], repID["@state"], repID["@state"], "USA")
-                allReps[name] = newRep
+        except (KeyError, TypeError):
+            fullResult = None
+    metaDataTuple = (int(metaData["congress"]), int(metaData["session"][0]), int(metaData["rollcall-num"]))
+    if partyData is None or fullResult is None:
+        return None
 
-            if repID["@party"] == "R":
-                party = "Republican"
-            elif repID["@party"] == "D":
-                party = "Democratic"
-            elif repID["@party"] == "I":
-                party = "Independent"
+    voteResult = {}
+    for partyResult in partyData:
+        voteResult[partyResult["party"]] = (int(partyResult["yea-total"]), int(partyResult["nay-total"]))
 
-            repOb = allReps[name]
-            repOb.addVote(voteOb, vote, party)
+    participants = []
+    for representative in fullResult:
+        repID = representative["legislator"]
+        if representative["vote"] == "Yea" or representative["vote"] == "Aye":
+            vote=1
+        elif representative["vote"] == "Nay" or representative["vote"] == "No":
+            vote=0
+        elif representative["vote"] == "Not Voting" or representative["vote"] == "Present":
+            continue
+        else:
+            print(representative["vote"])
+        name = repID["#text"] + " " + repID["@state"]
+
+        if repID["@party"] == "R":
+            party = "Republican"
+        elif repID["@party"] == "D":
+            party = "Democratic"
+        elif repID["@party"] == "I":
+            party = "Independent"
 
-    return allReps
+        participants.append((name, repID["#text"], repID["@state"], repID["@state"], vote, party))
+    return ParsedVote(metaDataTuple, voteResult, participants, metaDataTuple[0])
 
+def readUS(path: str, country: str, streaming: bool = False, workers: int = 1, manifestFile: str = None, voteSummaries: list = None, allReps: dict = None) -> List[Representative]:
+    """ retreive all of the relevant xml files.
+        Generate all the relevant Vote objects as well as the relevant Representative objects
+        Return a dictionary with keys of the representative's name, and values of Representative objects
+    """
+    return readFolder(path, parseUSFile, "USA", streaming, workers, manifestFile, voteSummaries, allReps)
@@ -0,0 +1,205 @@
+import numpy as np
+from collections import namedtuple
+
+from rollCallStore import RollCallStore
+
+# Every representative's votes as dense (representatives x votes) arrays, and the all pairs comparisons built on them.
+# Instead of comparing two representatives' vote lists at a time, every pair is compared at once with matrix products:
+# with signs holding +1 for yea, -1 for nay and 0 for votes the representative wasn't in,
+#   |signs| |signs|^T counts the votes every pair was both in,
+#   signs signs^T is (votes they agreed on) - (votes they disagreed on),
+# and the same products on one party's votes at a time count the votes every pair was in the same party for.
+# The products are done a block of representatives at a time so the memory used stays bounded.
+
+NO_PARTY = -1 # the pair has no votes in common
+CHANGED = -2  # the representative was in more than one party over the votes the pair has in common
+
+class RepMatrix(object):
+    """
+    Every vote of every representative as dense arrays.
+    Contains self.keys, the key of each representative in allReps, one per row
+    Contains self.voteIDs, the voteID of each vote, one per column
+    Contains self.parties, the party names; party codes are indices into it
+    Contains self.signs, +1 if the representative voted yea, -1 for nay, 0 if they weren't in the vote (int8, reps x votes)
+    Contains self.partyCodes, the party the representative was in for the vote, -1 if they weren't in it (int16, reps x votes)
+    Contains self.positions, where the vote is in the representative's own votes (rep.votes), -1 if they weren't in it (int32, reps x votes)
+    """
+    def __init__(self, keys, voteIDs, parties, signs, partyCodes, positions):
+        self.keys = keys
+        self.voteIDs = voteIDs
+        self.parties = parties
+        self.signs = signs
+        self.partyCodes = partyCodes
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.keys)
+
+def loadRepMatrix(allReps):
+    """ Build the RepMatrix of allReps (a dictionary with values of Representative objects, or a RollCallStore)
+        A RollCallStore is read straight from its columns, without building the Representative objects
+    """
+    if isinstance(allReps, RollCallStore):
+        keys = list(allReps)
+        voteIDs = [tuple(int(x) for x in voteID) for voteID in allReps.voteIDs]
+        rows = np.asarray(allReps.repIndex)
+        columns = np.asarray(allReps.voteIndex)
+        yeaNays = np.asarray(allReps.yeaNay)
+        codes = np.asarray(allReps.partyCode)
+        parties = list(allReps.parties)
+    else:
+        keys = []
+        voteIndex = {} # Dict[voteID, column]
+        partyIndex = {} # Dict[party, code]
+        rows, columns, yeaNays, codes = [], [], [], []
+        for row, repKey in enumerate(allReps):
+            keys.append(repKey)
+            for vote, yeaNay, party in allReps[repKey].votes:
+                if not vote.voteID in voteIndex:
+                    voteIndex[vote.voteID] = len(voteIndex)
+                if not party in partyIndex:
+                    partyIndex[party] = len(partyIndex)
+                rows.append(row)
+                columns.append(voteIndex[vote.voteID])
+                yeaNays.append(yeaNay)
+                codes.append(partyIndex[party])
+        voteIDs = list(voteIndex)
+        parties = list(partyIndex)
+
+    signs = np.zeros((len(keys), len(voteIDs)), dtype=np.int8)
+    partyCodes = np.full((len(keys), len(voteIDs)), -1, dtype=np.int16)
+    positions = np.full((len(keys), len(voteIDs)), -1, dtype=np.int32)
+    signs[rows, columns] = np.where(np.asarray(yeaNays, dtype=np.int8) == 1, 1, -1)
+    partyCodes[rows, columns] = codes
+    # either way the rep-votes are grouped by representative, each in the order of the representative's own votes
+    rows = np.asarray(rows, dtype=np.int64)
+    positions[rows, columns] = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    return RepMatrix(keys, voteIDs, parties, signs, partyCodes, positions)
+
+# the comparison of every pair of representatives, as (reps x reps) arrays where entry [i, j] is about the pair (keys[i], keys[j]):
+#   coAttendance, how many votes both were in
+#   agreements, how many of those votes they voted the same way in
+#   sameParty, how many of those votes they were in the same party for
+#   party, the code of the party keys[i] was in for every vote they were both in, NO_PARTY or CHANGED
+PairAgreement = namedtuple("PairAgreement", ["keys", "parties", "coAttendance", "agreements", "sameParty", "party"])
+
+def pairAgreement(matrix, blockSize=1024):
+    """ Compare every pair of representatives in matrix (a RepMatrix) at once, blockSize representatives at a time
+        Gives the same counts as binarySimilarity for every pair
+        returns a PairAgreement
+    """
+    numReps = len(matrix)
+    # float32 products are exact for counts below 2^24
+    attended = (matrix.signs != 0).astype(np.float32)
+    signs = matrix.signs.astype(np.float32)
+    coAttendance = np.empty((numReps, numReps), dtype=np.int64)
+    agreements = np.empty((numReps, numReps), dtype=np.int64)
+    for start in range(0, numReps, blockSize):
+        block = slice(start, start + blockSize)
+        coAttendance[block] = np.rint(attended[block] @ attended.T)
+        # signs signs^T = agreements - disagreements, and agreements + disagreements = coAttendance
+        agreements[block] = (coAttendance[block] + np.rint(signs[block] @ signs.T).astype(np.int64)) // 2
+
+    sameParty = np.zeros((numReps, numReps), dtype=np.int64)
+    partyCounts = np.zeros((numReps, len(matrix.parties)), dtype=np.int64) # how many votes each representative was in each party for
+    for code in range(len(matrix.parties)):
+        inParty = (matrix.partyCodes == code)
+        partyCounts[:, code] = inParty.sum(axis=1)
+        members = np.flatnonzero(partyCounts[:, code])
+        if len(members) == 0:
+            continue
+        memberVotes = inParty[members].astype(np.float32)
+        for start in range(0, len(members), blockSize):
+            block = members[start:start + blockSize]
+            sameParty[np.ix_(block, members)] += np.rint(memberVotes[start:start + blockSize] @ memberVotes.T).astype(np.int64)
+
+    # a representative who was only ever in one party was in that party for every vote they share with anyone
+    numParties = np.count_nonzero(partyCounts, axis=1)
+    party = np.where(coAttendance > 0, partyCounts.argmax(axis=1)[:, np.newaxis], NO_PARTY).astype(np.int16)
+    # party switchers have to be checked against every other representative: count the parties they were in over the shared votes
+    for i in np.flatnonzero(numParties > 1):
+        codes = np.flatnonzero(partyCounts[i])
+        perParty = np.stack([(matrix.partyCodes[i] == code).astype(np.float32) for code in codes]) @ attended.T
+        partiesShared = np.count_nonzero(perParty > 0.5, axis=0)
+        party[i] = np.where(partiesShared > 1, CHANGED, np.where(partiesShared == 1, codes[perParty.argmax(axis=0)], NO_PARTY))
+
+    return PairAgreement(matrix.keys, matrix.parties, coAttendance, agreements, sameParty, party)
+
+def partyName(agreement, code):
+    """ The party name binarySimilarity gives for a party code in agreement.party: "" for NO_PARTY and "Changed" for CHANGED
+    """
+    if code == NO_PARTY:
+        return ""
+    if code == CHANGED:
+        return "Changed"
+    return agreement.parties[code]
+
+# the party level result of every vote, as (votes x parties) arrays lined up with the columns of a RepMatrix:
+#   parties, the party names, the RepMatrix's parties first so their codes are the same
+#   present, whether the party is in the vote's result
+#   majority, whether more of the party voted yea than nay (a tie counts as nay)
+#   order, where the party is in the vote's result, -1 if it isn't
+PartyMajority = namedtuple("PartyMajority", ["parties", "present", "majority", "order"])
+
+def partyMajority(allReps, matrix):
+    """ Build the PartyMajority of the votes in matrix (the RepMatrix of allReps)
+        A RollCallStore is read straight from its vote columns
+    """
+    parties = list(matrix.parties)
+    if isinstance(allReps, RollCallStore):
+        offsets = np.asarray(allReps.resultOffsets)
+        rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        codes = np.asarray(allReps.resultParty)
+        counts = np.asarray(allReps.resultCounts)
+        positions = np.arange(len(codes)) - offsets[rows]
+    else:
+        column = {voteID: i for i, voteID in enumerate(matrix.voteIDs)}
+        partyIndex = {party: i for i, party in enumerate(parties)}
+        rows, codes, counts, positions = [], [], [], []
+        for repKey in allReps:
+            for vote, yeaNay, repParty in allReps[repKey].votes:
+                if column[vote.voteID] is None:
+                    continue
+                for position, (party, result) in enumerate(vote.voteResult.items()):
+                    if not party in partyIndex:
+                        partyIndex[party] = len(parties)
+                        parties.append(party)
+                    rows.append(column[vote.voteID])
+                    codes.append(partyIndex[party])
+                    counts.append(tuple(result))
+                    positions.append(position)
+                # every vote's result only has to be read once
+                column[vote.voteID] = None
+        counts = np.array(counts, dtype=np.int64).reshape(-1, 2)
+
+    present = np.zeros((len(matrix.voteIDs), len(parties)), dtype=bool)
+    majority = np.zeros((len(matrix.voteIDs), len(parties)), dtype=bool)
+    order = np.full((len(matrix.voteIDs), len(parties)), -1, dtype=np.int64)
+    present[rows, codes] = True
+    majority[rows, codes] = counts[:, 0] > counts[:, 1]
+    order[rows, codes] = positions
+    return PartyMajority(parties, present, majority, order)
+
+def partyIntervals(matrix, row):
+    """ Split the votes of the representative in row into the stretches they were in one party for, in voteID order
+        returns a list of (party code, array of the columns of the stretch)
+    """
+    columns = np.flatnonzero(matrix.signs[row])
+    columns = np.array(sorted(columns.tolist(), key=lambda column: matrix.voteIDs[column]), dtype=np.int64)
+    codes = matrix.partyCodes[row, columns]
+    starts = np.flatnonzero(np.diff(codes)) + 1
+    return [(int(stretch[0]), part) for stretch, part in zip(np.split(codes, starts), np.split(columns, starts))]
+
+def partyAgreement(signs, majority):
+    """ Compare (rows x votes) signs, +1 for yea, -1 for nay and 0 for votes not counted, with every party's majority at once
+        returns (how many of the votes each row voted the way each party's majority did, how many votes each party was in with it),
+        both (rows x parties)
+    """
+    present = majority.present.astype(np.float32)
+    yeaMajority = majority.majority.astype(np.float32)
+    yeas = (signs > 0).astype(np.float32)
+    nays = (signs < 0).astype(np.float32)
+    # float32 products are exact for counts below 2^24
+    agreements = np.rint(yeas @ yeaMajority + nays @ (present - yeaMajority)).astype(np.int64)
+    totals = np.rint((yeas + nays) @ present).astype(np.int64)
+    return agreements, totals
@@ -0,0 +1,139 @@
+import sys
+import time
+import numpy as np
+
+from repMatrix import loadRepMatrix, pairAgreement
+
+# Approximate nearest neighbours between representatives of different parties, so a chamber spanning many parliaments doesn't
+# need every pair compared. The representatives of each party in each parliament are hashed with random projection LSH:
+# numBits random hyperplanes give each of them a numBits bit code per table, from how their votes differ from their party's line
+# (the average of the party's votes). Votes along the party line say nothing about which members of a party are closest to
+# someone outside it, so without taking it out every member of a party lands in the same few buckets.
+# A query hashes the representative's votes against every other party's line in every parliament they were in, and only scores
+# the members of that party in the same bucket in at least one of numTables tables, exactly, by the same fraction of shared votes
+# voted the same way that repSimilarity uses. More tables find more of the true neighbours, more bits make the buckets smaller
+# and the queries faster.
+# Measures recall against the exact all pairs comparison (pairAgreement) when run directly:
+#   the first argument should be the pickle file (or roll call store) of allReps
+#   the optional second argument is the number of neighbours to find for each representative (default 10)
+#   the optional third argument is the number of representatives queried (default 200)
+
+class NeighbourIndex(object):
+    """
+    An LSH index of the representatives in a RepMatrix.
+    Contains self.matrix, the RepMatrix
+    Contains self.buckets, a dictionary of (parliament, party code, table, bucket code) -> array of the rows in that bucket
+    Contains self.queryCodes, the keys of self.buckets each row's votes hash to against the other parties, one list per row
+    """
+    def __init__(self, matrix, numTables=16, numBits=4, seed=0):
+        self.matrix = matrix
+        self.attended = matrix.signs != 0
+        rng = np.random.default_rng(seed)
+        hyperplanes = rng.standard_normal((matrix.signs.shape[1], numTables * numBits)).astype(np.float32)
+        parliaments = np.array([voteID[0] for voteID in matrix.voteIDs])
+        self.buckets = {}
+        self.queryCodes = [[] for row in range(len(matrix))]
+        for parliament in np.unique(parliaments).tolist():
+            columns = np.flatnonzero(parliaments == parliament)
+            rows = np.flatnonzero(self.attended[:, columns].any(axis=1))
+            codes = matrix.partyCodes[np.ix_(rows, columns)]
+            signs = matrix.signs[np.ix_(rows, columns)].astype(np.float32)
+            attended = signs != 0
+            # the party each representative was in for most of the parliament
+            rowParty = np.stack([(codes == code).sum(axis=1) for code in range(len(matrix.parties))], axis=1).argmax(axis=1)
+            for party in np.unique(rowParty).tolist():
+                members = rowParty == party
+                inParty = codes[members] == party
+                line = (signs[members] * inParty).sum(axis=0) / np.maximum(inParty.sum(axis=0), 1)
+                memberCodes = self.hash((signs[members] - line) * attended[members], hyperplanes[columns], numTables, numBits)
+                for table in range(numTables):
+                    order = np.argsort(memberCodes[:, table], kind="stable")
+                    tableCodes, starts = np.unique(memberCodes[order, table], return_index=True)
+                    for code, bucket in zip(tableCodes.tolist(), np.split(rows[members][order], starts[1:])):
+                        self.buckets[(parliament, party, table, code)] = bucket
+                # everyone outside the party is hashed against its line too, to find the members that vote most like them
+                queryCodes = self.hash((signs[~members] - line) * attended[~members], hyperplanes[columns], numTables, numBits)
+                for row, rowCodes in zip(rows[~members].tolist(), queryCodes.tolist()):
+                    self.queryCodes[row].extend((parliament, party, table, code) for table, code in enumerate(rowCodes))
+
+    @staticmethod
+    def hash(vectors, hyperplanes, numTables, numBits):
+        """ The bucket code of each of vectors in each table, from which side of each hyperplane it's on (rows x numTables)
+        """
+        bits = (vectors @ hyperplanes) > 0
+        return (bits.reshape(len(vectors), numTables, numBits) << np.arange(numBits)).sum(axis=2)
+
+    def candidates(self, row):
+        """ The rows of other parties in a bucket row's votes hash to in any table of any parliament (row itself included)
+        """
+        return np.unique(np.concatenate([self.buckets.get(bucket, np.array([], dtype=np.int64)) for bucket in self.queryCodes[row]] + [np.array([row])]))
+
+    def score(self, row, others, k, minShared=1):
+        """ The top k of others that were never in the same party as row for any vote they shared, and shared at least minShared votes
+            Ranked by the fraction of shared votes they voted the same way in, then by the number of shared votes
+            returns a list of (fraction, number of shared votes, row of the other representative), best first
+        """
+        matrix = self.matrix
+        # only the votes row was in can be shared
+        columns = np.flatnonzero(self.attended[row])
+        both = self.attended[np.ix_(others, columns)]
+        shared = both.sum(axis=1)
+        agreements = (both & (matrix.signs[np.ix_(others, columns)] == matrix.signs[row, columns])).sum(axis=1)
+        sameParty = (both & (matrix.partyCodes[np.ix_(others, columns)] == matrix.partyCodes[row, columns])).sum(axis=1)
+        keep = (shared >= minShared) & (sameParty == 0) & (others != row)
+        results = [(int(a) / int(s), int(s), int(other)) for a, s, other in zip(agreements[keep], shared[keep], others[keep])]
+        return sorted(results, key=lambda result: (-result[0], -result[1], result[2]))[:k]
+
+    def query(self, row, k=10, minShared=1):
+        """ The approximate top k cross party neighbours of the representative in row (see score)
+        """
+        return self.score(row, self.candidates(row), k, minShared)
+
+def exactNeighbours(agreement, row, k=10, minShared=1):
+    """ The exact top k cross party neighbours of the representative in row from a PairAgreement, ranked the same way as NeighbourIndex.score
+    """
+    others = np.flatnonzero((agreement.coAttendance[row] >= minShared) & (agreement.sameParty[row] == 0))
+    others = others[others != row]
+    results = [(int(agreement.agreements[row, other]) / int(agreement.coAttendance[row, other]), int(agreement.coAttendance[row, other]), int(other))
+               for other in others]
+    return sorted(results, key=lambda result: (-result[0], -result[1], result[2]))[:k]
+
+def allNeighbours(matrix, k=10, numTables=16, numBits=4, minShared=1):
+    """ The approximate top k cross party neighbours of every representative in matrix (a RepMatrix)
+        returns a dictionary with keys of the representatives' keys and values of lists of (fraction of shared votes voted the same, shared votes, key)
+    """
+    index = NeighbourIndex(matrix, numTables, numBits)
+    return {matrix.keys[row]: [(fraction, shared, matrix.keys[other]) for fraction, shared, other in index.query(row, k, minShared)]
+            for row in range(len(matrix))}
+
+def measureRecall(matrix, settings, k=10, numQueries=200, seed=0):
+    """ For every (numTables, numBits) in settings, how many of the exact top k neighbours the index finds
+        returns a list of (numTables, numBits, recall, average number of candidates scored per query, seconds per query)
+    """
+    agreement = pairAgreement(matrix)
+    rows = np.random.default_rng(seed).choice(len(matrix), min(numQueries, len(matrix)), replace=False)
+    exact = {row: set(other for _, _, other in exactNeighbours(agreement, row, k)) for row in rows.tolist()}
+    results = []
+    for numTables, numBits in settings:
+        index = NeighbourIndex(matrix, numTables, numBits, seed)
+        found = 0
+        numCandidates = 0
+        start = time.perf_counter()
+        for row in exact:
+            numCandidates += len(index.candidates(row))
+            found += len(exact[row] & set(other for _, _, other in index.query(row, k)))
+        seconds = (time.perf_counter() - start) / len(exact)
+        total = sum(len(neighbours) for neighbours in exact.values())
+        results.append((numTables, numBits, found / total if total else 1.0, numCandidates / len(exact), seconds))
+    return results
+
+if __name__ == "__main__":
+    from representativeAnalysis import loadReps
+    matrix = loadRepMatrix(loadReps(sys.argv[1]))
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    numQueries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    settings = [(numTables, numBits) for numBits in (2, 3, 4, 6, 8) for numTables in (4, 8, 16, 32)]
+    print("%d representatives, %d votes" % (len(matrix), len(matrix.voteIDs)))
+    print("%7s %5s %8s %12s %12s" % ("tables", "bits", "recall", "candidates", "ms / query"))
+    for numTables, numBits, recall, numCandidates, seconds in measureRecall(matrix, settings, k, numQueries):
+        print("%7d %5d %8.3f %12.1f %12.3f" % (numTables, numBits, recall, numCandidates, seconds * 1000))
@@ -0,0 +1,575 @@
+from typing import List
+from tabulate import tabulate
+import json
+from os.path import join, isdir
+from inspect import signature
+from pickle import load
+import numpy as np
+
+from Representative import Representative
+from readCanada import readCanada
+from readUS import readUS
+from readSwitzerland import readSwitzerland
+from rollCallStore import RollCallStore
+from figures import regressionFigure
+from repMatrix import loadRepMatrix, pairAgreement, partyName, partyMajority, partyIntervals, partyAgreement
+from repNeighbours import allNeighbours
+from termTable import termSummaries
+from lazyImports import stats, sm
+
+# The representative level analysis, as a library.
+# Every analysis is a function that takes allReps (a dictionary with values of Representative objects, or a RollCallStore),
+# and RepDataset keeps a loaded allReps in memory with every analysis as a method, so a notebook or a long running worker
+# can load the data once and answer many queries. analyzeRepresentative.py is the command line interface to it.
+
+def retrieveFromFolder(path: str, country: str, streaming: bool = True, workers: int = 1, manifestFile: str = None, voteSummaries: list = None, allReps: dict = None) -> List[Representative]:
+    """ retreive and process all of the relevant xml files.
+        Generate all the relevant Vote, and Representative objects
+        Return a dictionary with keys of the representative's name (or unique tag), and values of Representative objects
+        streaming reads the xml incrementally instead of building the full xmltodict tree (see benchmarkReaders.py)
+        workers is the number of processes the files are parsed in. The result is the same for any number of workers
+        manifestFile records every file that was read, so the next call only parses new or changed files
+            and merges them into allReps, the dataset saved along with the manifest (every file is parsed if allReps isn't given)
+        voteSummaries, if it's a list, gets the party level summary of every vote appended to it (the format analyzeVoteData.py reads)
+    """
+    if country.lower() == "switzerland" or country.lower() == "swiss":
+        return readSwitzerland(path, country, streaming, workers, manifestFile, voteSummaries, allReps)
+    elif country.lower() == "usa" or country.lower() == "us":
+        return readUS(path, country, streaming, workers, manifestFile, voteSummaries, allReps)
+    elif country.lower() == "canada":
+        return readCanada(path, country, streaming, workers, manifestFile, voteSummaries, allReps)
+    else:
+        raise ValueError("unknown country %r, it should be one of 'switzerland', 'canada', 'USA'" % country)
+
+def representativesByNumberOfRebellions(allReps):
+    """ Categorize representatives based on the number of times they've voted against party lines
+        return a dictionary where the keys are an integer (number of rebellions) and the values are representatives
+    """
+    repsByNumRebellions = {}
+    for rep in allReps:
+        totalVotes = allReps[rep].numVotes
+        numRebellions = allReps[rep].numRebellions
+
+        if not numRebellions in repsByNumRebellions:
+            repsByNumRebellions[numRebellions] = []
+        repsByNumRebellions[numRebellions].append(rep)
+
+    return repsByNumRebellions
+
+
+# the term number analyses below are group-bys over one table of (rep, parliament, party, term) counts (see termTable.py)
+def repsByNumTimesInGov(allReps):
+    """ Categorize representatives based on number of terms they've been in government and take the average rebellion rate of each category
+        return a dictionary with keys as number of terms (integer) and values as the average rebellion rate of representatives serving that number of terms
+    """
+    return termSummaries(allReps).byNumTerms
+
+def rebellionsPerPartyPerSession(allReps):
+    """ Finds how much a particular party votes against party lines in a particular year
+        Similar thing done in other file, but it is repeated here for the sake of compatibility
+    """
+    parties = {} # will hold parties as keys, and a dictionary as a value
+                 # the nested dictionary will have keys of years and values of tuples of (# rebellions in year, # votes in year)
+    for repName in allReps:
+        rep = allReps[repName]
+        for (year, party), (numVotes, numRebellions) in rep.parliamentPartyCounts.items():
+            # initialize parties
+            if not party in parties:
+                parties[party] = {}
+            # initialize a given year for a party
+            if not year in parties[party]:
+                parties[party][year] = [0,0]
+
+            parties[party][year][1] += numVotes
+            parties[party][year][0] += numRebellions
+    return parties
+
+
+
+def rebellionsByTermNumber(allReps):
+    """ Analyze behaviour of nth term representatives.
+        looks at how many rebellions/votes a representative had in their first term, second term and so on
+        group the behaviour of all representatives in their first term, similarly group the second term etc.
+        returns a list saying how often nth term representatives vote against party lines
+    """
+    return termSummaries(allReps).byTerm
+
+def rebellionsByTermAndParty(allReps):
+    """ Same as rebellionsByTermNumber but also breaks it down by party
+        returns a dictionary with keys of (term number, party) and values of (total number of votes, total number of rebellions, percent rebellions)
+    """
+    return termSummaries(allReps).byTermAndParty
+
+def termPartyAccountForYear(allReps):
+    """ Does same thing as rebellionsByTermAndParty() but accounts for the parties voting behaviour at the time
+        returns a dictionary with keys of parties and values of the summary of their regression (print one to read it)
+    """
+
+    # Dict[party, Dict[session, Dict[term number, (num rebellions, num votes)]]]
+    partyData = termSummaries(allReps).byPartySessionTerm
+
+    # for every party create a data array and a result vector
+    # where data array is a 2d array where every row is a list of [year, term]
+    # and the corresponding value in result vector is num rebellions / num votes
+    summaries = {}
+    for party in partyData:
+        dataArray = []
+        resultVector = []
+        data = partyData[party]
+        for session in data:
+            for termNum in data[session]:
+                rebelData = data[session][termNum]
+                rebelRate = rebelData[0] / rebelData[1]
+                dataArray.append([session, termNum])
+                resultVector.append(rebelRate)
+        # prediction = LinearRegression().fit(dataArray, resultVector)
+        # print(party, prediction.coef_)
+        X2 = sm.add_constant(dataArray)
+        est = sm.OLS(resultVector, X2)
+        est2 = est.fit()
+        summaries[party] = est2.summary()
+    return summaries
+
+def regressWithinParty(termSummary, figures=None):
+    """ Take in termSummary from above method.
+        Check if the number of terms a representative is in parliament for affects the amount they rebel
+        If figures is a list the scatter plot and regression line of every party are added to it (see figures.py)
+        returns a dictionary with keys of parties and values of the regression of their rebellions on term number
+        (only parties with more than two terms are regressed)
+    """
+    # sort by party. every key in partyList will be a party 
+    # and the values will be how representatives in the party behaved in their first term, second term etc
+    partyList = {}
+    for term, party in termSummary:
+        if not party in partyList:
+            partyList[party] = []
+        partyList[party].append((term, termSummary[(term,party)][2]))
+
+    regressions = {}
+    for party in partyList:
+        termNum = []
+        rebellionPercent = []
+        for vote in partyList[party]:
+            termNum.append(vote[0])
+            rebellionPercent.append(vote[1])
+        
+        # see if representative behaviour over time is linear
+        if(len(partyList[party]) > 2):
+            regress = stats.linregress(termNum, rebellionPercent)
+            regressions[party] = regress
+            if figures is not None:
+                figures.append(regressionFigure("regressWithinParty-" + str(party), termNum, rebellionPercent, regress, str(party)))
+    return regressions
+
+
+# result = rebellionsByTermAndParty(allReps)
+# regressWithinParty(result)
+# tableVersion = []
+# for entry in sorted(result.keys()):
+#     data = result[entry]
+#     tableVersion.append([entry[0], entry[1], data[0], data[1], data[2]])
+
+
+def rebellionsByElectionResult(allReps, figures=None):
+    """ Only use for Canada
+        See if election result coorelates with individual representative behaviour
+        If figures is a list the scatter plot and regression line are added to it (see figures.py)
+    """
+
+    allElectionResults = {}
+    for i in range(38,43):
+        fileName = join("./voteData/electionResults/", str(i)+".json")
+        # this file contains a dictionary for a particular election
+        # the keys of the dict are names of the winners, and values are the number of votes each person got in decreasing order
+        # only contains name of elected representative
+        with open(fileName) as f:
+            allElectionResults[i] = (json.loads(f.read()))
+
+    # will contain keys of (representative name, parliament number)
+    # and values of (total votes in riding, and vote percent of this representative)
+    electionReps = {}
+    for parNum in allElectionResults:
+        elec = allElectionResults[parNum]
+        for rep in elec:
+            voteTotal = 0
+            for voteForCandidate in elec[rep]:
+                voteTotal += voteForCandidate
+            electionReps[(rep,parNum)] = voteTotal, elec[rep][0]/voteTotal
+
+    # this just takes the "Mr." and "Mrs." out of names
+    modifiedAllReps = {}
+    for rep in allReps:
+        newKey = " ".join(rep.split()[1:])         
+        modifiedAllReps[newKey] = allReps[rep]
+
+    # so there is a reasonable sized problem here
+    # I'm getting names from two different locations and kinda hoping that they're the same
+    # The problem with this is that in many cases people write their names differntly e.g. Alex vs Alexander
+    # This problem is hightened by the fact that one system deals with accents well while the other one doesn't
+    # The solution for the time being is to ignore any representative whose name appears in one list but not the other
+    # This work around ignores about 10% of the data
+    # A very big TODO is to fix this, but that's a task for another day
+    rebellionInTerm = {}
+    for rep,parNum in electionReps:
+        try:
+            repRecord = modifiedAllReps[rep] # i have a feeling that something is going to break here
+        except:
+            continue
+        numVotes = 0
+        numRebellions = 0
+        for (parliament, party), counts in repRecord.parliamentPartyCounts.items():
+            if parliament == parNum:
+                numVotes += counts[0]
+                numRebellions += counts[1]
+        if numVotes != 0: # speakers of the house don't vote
+            rebellionInTerm[(rep,parNum)] = numRebellions/numVotes*100
+
+    # now we want to try correlate the value in electionReps with the values in rebellionInTerm
+    electionRepsList = []
+    rebellionInTermList = []
+    for name, parNum in rebellionInTerm:
+        electionRepsList.append(electionReps[(name,parNum)][1])
+        rebellionInTermList.append(rebellionInTerm[(name,parNum)])
+
+    regress = stats.linregress(electionRepsList, rebellionInTermList)
+    if figures is not None:
+        figures.append(regressionFigure("rebellionsByElectionResult", electionRepsList, rebellionInTermList, regress, "rebellions by election result"))
+    return regress
+            
+# rebellionsByElectionResult(allReps)
+
+def binarySimilarity(allReps, repName1, repName2):
+    """ takes two representatives names and compares how often they vote similarly
+        Return a tuple with (repName1, repName2, number of votes they voted the same, number of votes they voted differently)
+    """ 
+    # create dictionary of representative votes so we can have constant time access
+    rep1Votes = {}
+    for vote in repVotes(allReps, repName1):
+        id = vote[0].voteID
+        rep1Votes[id] = vote
+
+    rep2Votes = {}
+    for vote in repVotes(allReps, repName2):
+        id = vote[0].voteID
+        rep2Votes[id] = vote
+
+    similarVotes = 0
+    dissimilarVotes = 0
+    rep1PermanentParty = ""
+    rep2PermanentParty = ""
+    numSameParty = 0
+    for vote1 in rep1Votes:
+        if vote1 in rep2Votes:
+            rep1Result = rep1Votes[vote1][1]
+            rep2Result = rep2Votes[vote1][1]
+            
+            rep1Party = rep1Votes[vote1][2]
+            rep2Party = rep2Votes[vote1][2]
+
+            if rep1PermanentParty == "":
+                rep1PermanentParty = rep1Party
+            elif rep1PermanentParty != rep1Party:
+                rep1PermanentParty = "Changed"
+
+            if rep2PermanentParty == "":
+                rep2PermanentParty = rep2Party
+            elif rep2PermanentParty != rep2Party:
+                rep2PermanentParty = "Changed"
+
+            
+            if rep1Party == rep2Party:
+                numSameParty += 1
+
+            if rep1Result == rep2Result:
+                similarVotes += 1
+            else:
+                dissimilarVotes += 1
+    return (repName1, repName2, similarVotes, dissimilarVotes, numSameParty, rep1PermanentParty, rep2PermanentParty)
+
+def repSimilarity(allReps):
+    """ Compare how often representatives from different parties vote the same way, for every pair of representatives in allReps.
+        Every pair is compared at once with matrix products over a (reps x votes) matrix (see repMatrix.py),
+        with the same counts binarySimilarity gives for a single pair
+        Return a sorted list of (fraction of shared votes they voted the same in, number of shared votes, rep1, rep1 party, rep2, rep2 party)
+        for every ordered pair that shares at least one vote and was never in the same party for any of them
+    """
+    agreement = pairAgreement(loadRepMatrix(allReps))
+    diffPartyResults = []
+    for i, j in np.argwhere((agreement.sameParty == 0) & (agreement.coAttendance > 0)).tolist():
+        ratioSame = int(agreement.agreements[i, j]) / int(agreement.coAttendance[i, j])
+        diffPartyResults.append((ratioSame, int(agreement.coAttendance[i, j]), agreement.keys[i], partyName(agreement, agreement.party[i, j]),
+                                 agreement.keys[j], partyName(agreement, agreement.party[j, i])))
+    return sorted(diffPartyResults)
+
+# repSimilarity(allReps)
+
+def crossPartyNeighbours(allReps, k=10):
+    """ The k representatives from other parties that vote most like each representative in allReps, found without comparing every pair
+        Approximate: the ones repSimilarity ranks highest may be missed (see repNeighbours.py for how often)
+        Return a dictionary with keys of the representatives and values of lists of (fraction of shared votes they voted the same in,
+        number of shared votes, rep), most similar first
+    """
+    return allNeighbours(loadRepMatrix(allReps), k)
+
+def similarityToParty(allReps):
+    """ Compares how similarly representatives vote compared to the party at large.
+        Notes when the most similar party to a representative is not their own party
+        Every representative is compared to the majority of every party at once with matrix products (see repMatrix.py)
+        A representative who switched parties is scored separately for every stretch of votes they were in one party for,
+        with keys of (rep, voteID of the first vote of the stretch) instead of rep
+        Return a dictionary with values of [name, party, similarity to party, closest party, similarity to closest party]
+    """
+    matrix = loadRepMatrix(allReps)
+    majority = partyMajority(allReps, matrix)
+    # one row per representative who stayed in one party, then one per stretch of every party switcher
+    rows, keys, repParties = [], [], []
+    stretchRows, stretchKeys, stretchParties, stretches = [], [], [], []
+    for row in range(len(matrix)):
+        intervals = partyIntervals(matrix, row)
+        if len(intervals) == 1:
+            rows.append(row)
+            keys.append(matrix.keys[row])
+            repParties.append(intervals[0][0])
+            continue
+        for party, columns in intervals:
+            stretch = np.zeros(len(matrix.voteIDs), dtype=np.int8)
+            stretch[columns] = matrix.signs[row, columns]
+            stretches.append(stretch)
+            stretchRows.append(row)
+            stretchKeys.append((matrix.keys[row], matrix.voteIDs[columns[0]]))
+            stretchParties.append(party)
+    signs = np.concatenate([matrix.signs[rows]] + ([np.stack(stretches)] if stretches else []))
+    rows, keys, repParties = rows + stretchRows, keys + stretchKeys, repParties + stretchParties
+    agreements, totals = partyAgreement(signs, majority)
+    scores = agreements / np.maximum(totals, 1)
+
+    # ties go to the party the representative first voted with, as they would looping over their own votes in order
+    counted = signs != 0
+    positions = matrix.positions[rows]
+    firstSeen = np.empty(scores.shape, dtype=np.int64)
+    for party in range(len(majority.parties)):
+        # the column of the representative's earliest vote the party was in
+        firstVote = np.where(counted & majority.present[:, party], positions, np.iinfo(np.int32).max).argmin(axis=1)
+        firstSeen[:, party] = positions[np.arange(len(rows)), firstVote] * len(majority.parties) + majority.order[firstVote, party]
+    candidates = np.where((totals > 0) & (scores > 0), scores, -1)
+    best = candidates == candidates.max(axis=1)[:, np.newaxis]
+    closest = np.where(best, firstSeen, np.iinfo(np.int64).max).argmin(axis=1)
+
+    returnDict = {}
+    for i, (row, key, repParty) in enumerate(zip(rows, keys, repParties)):
+        if candidates[i, closest[i]] < 0 or closest[i] == repParty:
+            continue
+        returnDict[key] = [allReps[matrix.keys[row]].name, majority.parties[repParty], float(scores[i, repParty]),
+                           majority.parties[closest[i]], float(scores[i, closest[i]])]
+    return returnDict
+
+# similarity = similarityToParty(allReps)
+# simList = [similarity[key] for key in similarity]
+# simList = sorted(simList, key=lambda list: abs(list[2]-list[4]), reverse=True)
+# print(tabulate(simList))
+
+def repVotes(allReps, repName):
+    """ Yield (vote object, rep's vote (1 for yea, 0 for nay), party) for every vote of the representative
+        A RollCallStore reads them straight from its columns instead of building the Representative
+    """
+    if isinstance(allReps, RollCallStore):
+        return allReps.repVotes(repName)
+    return allReps[repName].iterVotes()
+
+def getVoteList(allReps):
+    """ return a dictionary with keys of voteIDs and values of the Vote objects of every vote any representative was in
+    """
+    if isinstance(allReps, RollCallStore):
+        return allReps.allVotes()
+    allVotes = {}
+    for repName in allReps:
+        for voteOb in allReps[repName].voteObjects:
+            voteID = voteOb.voteID
+            if not voteID in allVotes:
+                allVotes[voteID] = voteOb
+    return allVotes
+
+def getVoteParticipants(allReps):
+    """ Invert allReps so that votes can be looked up instead of representatives
+        return a dictionary with keys of voteIDs and values of a list of (repName, rep's vote (1 for yea, 0 for nay), party) for everyone who voted in it
+    """
+    if isinstance(allReps, RollCallStore):
+        return allReps.voteParticipants()
+    participants = {} # Dict[voteID, List[(repName, yeaNay, party)]]
+    for repName in allReps:
+        for vote, yeaNay, party in allReps[repName].iterVotes():
+            if not vote.voteID in participants:
+                participants[vote.voteID] = []
+            participants[vote.voteID].append((repName, yeaNay, party))
+    return participants
+
+def getRepsByProvince(allReps):
+    """ Classify representatives by province
+        return a dictionary with keys of provinces and values of a list of names of the representatives from that province
+    """
+    provinces = {} # Dict[prov, List[repName]]
+    if isinstance(allReps, RollCallStore):
+        # a RollCallStore has every representative's province in its representative table
+        repProvinces = [(rep[0], rep[3]) for rep in allReps.reps]
+    else:
+        repProvinces = [(repName, allReps[repName].province) for repName in allReps]
+    for repName, province in repProvinces:
+        if not province in provinces:
+            provinces[province] = []
+        provinces[province].append(repName)
+    return provinces
+
+def provinceDefect(allReps):
+    """ Compare how cohesively the representatives of each province vote against how cohesive they would be if they all voted with their party
+        return a dictionary with keys of provinces and values of a list of (expected cohesion, actual cohesion), one for every vote the province took part in
+    """
+    allVotes = getVoteList(allReps)
+    participants = getVoteParticipants(allReps)
+
+    # classify representatives by province
+    provinces = getRepsByProvince(allReps)
+    repProvince = {} # Dict[repName, prov]
+    for prov in provinces:
+        for repName in provinces[prov]:
+            repProvince[repName] = prov
+
+    # from here we compare exptected province cohesion against actual province cohesion
+    # for every vote we calculate what the majority of the party voted for to get an expected result for the provincial representatives. 
+    # from this we calculate expected provincial cohesion
+    # we then calculate actual provincial cohesion and see if it's higher
+    allData = {} # Dict[province, List[(expected cohesion, actual cohesion)]]
+    for prov in provinces:
+        allData[prov] = []
+
+    for voteID in allVotes:
+        # start with calculating vote cohesion
+        result = allVotes[voteID].voteResult
+        cohesion = {} # Dict[party, whether the party voted yea]
+        for party in result:
+            cohesion[party] = result[party][0] > result[party][1]
+
+        # now we get every representative that participated in this vote, grouped by province
+        # Dict[prov, [expected yea, expected nay, actual yea, actual nay]]
+        provinceVotes = {}
+        for repName, yeaNay, party in participants[voteID]:
+            prov = repProvince[repName]
+            if not prov in provinceVotes:
+                provinceVotes[prov] = [0,0,0,0]
+            counts = provinceVotes[prov]
+            # the expected vote is how their party voted
+            if cohesion[party]:
+                counts[0] += 1
+            else:
+                counts[1] += 1
+            # and the actual vote is how they voted
+            if yeaNay == 1:
+                counts[2] += 1
+            else:
+                counts[3] += 1
+
+        for prov in provinceVotes:
+            expectedYea, expectedNay, actualYea, actualNay = provinceVotes[prov]
+            expectedProvinceCohesion = max(expectedYea, expectedNay) / (expectedYea + expectedNay)
+            actualProvinceCohesion = max(actualYea, actualNay) / (actualYea + actualNay)
+            allData[prov].append((expectedProvinceCohesion, actualProvinceCohesion))
+    return allData
+
+def loadReps(path):
+    """ Open allReps from a pickle file or a roll call store folder
+    """
+    if isdir(path):
+        return RollCallStore(path)
+    with open(path, "rb") as f:
+        return load(f)
+
+# every function above that only takes allReps, which runAnalyses (and analyzeRepresentative.py -o) can run, by name
+ANALYSES = ("representativesByNumberOfRebellions", "repsByNumTimesInGov", "rebellionsPerPartyPerSession", "rebellionsByTermNumber",
+            "rebellionsByTermAndParty", "termPartyAccountForYear", "rebellionsByElectionResult", "repSimilarity",
+            "crossPartyNeighbours", "similarityToParty", "getVoteList", "getVoteParticipants", "getRepsByProvince", "provinceDefect")
+# and the ones RepDataset can run, which includes the functions that need arguments after allReps
+QUERIES = ANALYSES + ("binarySimilarity",)
+
+class RepDataset(object):
+    """
+    A loaded allReps with every analysis in QUERIES as a method (dataset.provinceDefect(), dataset.binarySimilarity(name1, name2), ...)
+    Contains self.allReps, the dictionary of Representative objects (or a RollCallStore)
+    Contains self.path, the pickle file or roll call store it was opened from (None if it was given allReps)
+    Contains self.results, the result (and figures) of every query so far, so asking again doesn't recompute it.
+    The results are shared, not copied, so don't change them
+    """
+    def __init__(self, allReps, path=None):
+        self.allReps = allReps
+        self.path = path
+        self.results = {} # Dict[(analysis, arguments), (result, figures)]
+
+    @classmethod
+    def open(cls, path):
+        """ Load the pickle file or roll call store at path
+        """
+        return cls(loadReps(path), path)
+
+    def query(self, analysis, *args, figures=None):
+        """ Run the analysis in QUERIES with the given name (and any arguments after allReps that it takes) and return its result
+            If figures is a list, the figures the analysis draws are added to it
+        """
+        if not analysis in QUERIES:
+            raise ValueError("unknown analysis %r" % analysis)
+        key = (analysis, args)
+        if not key in self.results:
+            function = globals()[analysis]
+            analysisFigures = []
+            if "figures" in signature(function).parameters:
+                result = function(self.allReps, *args, figures=analysisFigures)
+            else:
+                result = function(self.allReps, *args)
+            self.results[key] = (result, analysisFigures)
+        result, analysisFigures = self.results[key]
+        if figures is not None:
+            figures.extend(analysisFigures)
+        return result
+
+    def regressWithinParty(self, figures=None):
+        """ regressWithinParty on the result of rebellionsByTermAndParty
+        """
+        return regressWithinParty(self.query("rebellionsByTermAndParty"), figures)
+
+def analysisMethod(analysis):
+    """ The RepDataset method that runs the analysis with the given name
+    """
+    def method(self, *args, figures=None):
+        return self.query(analysis, *args, figures=figures)
+    method.__name__ = analysis
+    method.__doc__ = globals()[analysis].__doc__
+    return method
+
+for analysis in QUERIES:
+    setattr(RepDataset, analysis, analysisMethod(analysis))
+
+def runAnalyses(path, analyses, cache, figures=None):
+    """ Run every analysis named in analyses on the allReps saved at path, using the results in cache (a ResultCache) where it has them
+        allReps is only loaded if some result isn't cached
+        If figures is a list, the figures of the analyses that draw any are added to it, and cached along with their results
+        returns a dictionary with keys of the analysis names and values of their results
+    """
+    fingerprint = cache.fingerprint(path)
+    loaded = []
+    def dataset():
+        if not loaded:
+            loaded.append(RepDataset.open(path))
+        return loaded[0]
+
+    def withFigures(analysis):
+        analysisFigures = []
+        return dataset().query(analysis, figures=analysisFigures), analysisFigures
+
+    results = {}
+    for analysis in analyses:
+        if not analysis in ANALYSES:
+            raise ValueError("unknown analysis %r" % analysis)
+        if figures is not None and "figures" in signature(globals()[analysis]).parameters:
+            results[analysis], analysisFigures = cache.call(fingerprint, analysis, lambda: withFigures(analysis), {"figures": True})
+            figures.extend(analysisFigures)
+        else:
+            results[analysis] = cache.call(fingerprint, analysis, lambda: dataset().query(analysis))
+    cache.flush()
+    return results
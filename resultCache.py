@@ -0,0 +1,176 @@
+import sys
+from collections import namedtuple
+from hashlib import sha256
+from os import listdir, makedirs, remove, replace, stat
+from os.path import abspath, isdir, isfile, join
+from pickle import dump, dumps, load
+
+from readFolder import fileHash
+
+# An on disk cache of analysis results, so running the same analysis on the same data again doesn't recompute it.
+# A result is keyed on a fingerprint of the contents of the dataset it was computed from, the name of the function and its parameters,
+# so changing the data (or asking for different parameters) never returns a stale result.
+# The cache folder holds one pickle per result (<key>.pkl) and index.pkl, a pickled dictionary of:
+#   "version": CACHE_VERSION
+#   "clock": incremented every time a result is used, to order the entries for eviction
+#   "hashes": Dict[absolute path of a dataset file, (size, mtime, sha256)] so unchanged files aren't hashed again
+#   "entries": Dict[key, CacheEntry]
+# Once the results add up to more than maxBytes the least recently used ones are removed.
+# Using a result only changes the index in memory, it's written once a run is done with the cache (flush) or a result is stored.
+# Can be run directly to look at or clear a cache:
+#   -l lists the results in a cache
+#      the second argument should be the cache folder
+#   -i invalidates results
+#      the second argument should be the cache folder
+#      any further arguments are the datasets (files or roll call store folders) whose results are removed; if there are none every result is removed
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 2**20
+CacheEntry = namedtuple("CacheEntry", ["fingerprint", "function", "size", "used"])
+
+class ResultCache(object):
+    """
+    A folder of cached analysis results.
+    Contains self.path, the folder, and self.maxBytes, how big the results are allowed to get in total
+    """
+    def __init__(self, path, maxBytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.maxBytes = maxBytes
+        makedirs(path, exist_ok=True)
+        self.indexFile = join(path, "index.pkl")
+        self.index = {"version": CACHE_VERSION, "clock": 0, "hashes": {}, "entries": {}}
+        self.changed = False # whether the index in memory has changes that aren't saved yet
+        if isfile(self.indexFile):
+            with open(self.indexFile, "rb") as f:
+                index = load(f)
+            if index.get("version") == CACHE_VERSION:
+                self.index = index
+
+    def saveIndex(self):
+        """ Write the index to a temporary file first so an interrupted save can't corrupt it
+        """
+        tempFile = self.indexFile + ".tmp"
+        with open(tempFile, "wb") as f:
+            dump(self.index, f)
+        replace(tempFile, self.indexFile)
+        self.changed = False
+
+    def flush(self):
+        """ Save the index if using results (or hashing dataset files) changed it since it was last saved
+        """
+        if self.changed:
+            self.saveIndex()
+
+    def fileFingerprint(self, fileName):
+        """ The sha256 of the contents of fileName, only hashing it again if its size or modification time changed
+        """
+        fileName = abspath(fileName)
+        fileStat = stat(fileName)
+        known = self.index["hashes"].get(fileName)
+        if known is not None and known[0] == fileStat.st_size and known[1] == fileStat.st_mtime_ns:
+            return known[2]
+        contentHash = fileHash(fileName)
+        self.index["hashes"][fileName] = (fileStat.st_size, fileStat.st_mtime_ns, contentHash)
+        self.changed = True
+        return contentHash
+
+    def fingerprint(self, path):
+        """ A fingerprint of the contents of the dataset at path, which is either a file or a folder (like a roll call store)
+            The fingerprint of a folder covers the names and contents of every file in it
+        """
+        if not isdir(path):
+            return self.fileFingerprint(path)
+        digest = sha256()
+        for name in sorted(listdir(path)):
+            if isfile(join(path, name)):
+                digest.update(name.encode() + b"\0" + self.fileFingerprint(join(path, name)).encode())
+        return digest.hexdigest()
+
+    def key(self, fingerprint, function, params=None):
+        """ The cache key of running the function with the given name on the dataset with fingerprint, with the keyword arguments params
+        """
+        params = sorted((params or {}).items())
+        return sha256(dumps((fingerprint, function, params), protocol=4)).hexdigest()
+
+    def get(self, key):
+        """ Return (True, the cached result) if key is in the cache, and (False, None) otherwise
+            Marking the result as used isn't saved until the next flush
+        """
+        entry = self.index["entries"].get(key)
+        if entry is None or not isfile(join(self.path, key + ".pkl")):
+            return False, None
+        with open(join(self.path, key + ".pkl"), "rb") as f:
+            result = load(f)
+        self.index["clock"] += 1
+        self.index["entries"][key] = entry._replace(used=self.index["clock"])
+        self.changed = True
+        return True, result
+
+    def put(self, key, fingerprint, function, result):
+        """ Store result under key, then evict the least recently used results until the cache fits in maxBytes
+        """
+        resultFile = join(self.path, key + ".pkl")
+        with open(resultFile + ".tmp", "wb") as f:
+            dump(result, f)
+        replace(resultFile + ".tmp", resultFile)
+        self.index["clock"] += 1
+        self.index["entries"][key] = CacheEntry(fingerprint, function, stat(resultFile).st_size, self.index["clock"])
+        self.evict()
+        self.saveIndex()
+
+    def evict(self):
+        """ Remove the least recently used results until the total size is at most maxBytes (the newest result is always kept)
+        """
+        entries = self.index["entries"]
+        total = sum(entry.size for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key].used)[:-1]:
+            if total <= self.maxBytes:
+                break
+            total -= entries[key].size
+            self.remove(key)
+
+    def remove(self, key):
+        """ Remove the result stored under key
+        """
+        del self.index["entries"][key]
+        if isfile(join(self.path, key + ".pkl")):
+            remove(join(self.path, key + ".pkl"))
+
+    def invalidate(self, fingerprint=None, function=None):
+        """ Remove every result of the dataset with fingerprint and of the function with the given name
+            (either left as None matches everything). Returns the number of results removed
+        """
+        removed = [key for key, entry in self.index["entries"].items()
+                   if (fingerprint is None or entry.fingerprint == fingerprint) and (function is None or entry.function == function)]
+        for key in removed:
+            self.remove(key)
+        self.saveIndex()
+        return len(removed)
+
+    def call(self, fingerprint, function, compute, params=None):
+        """ Return the cached result of the function with the given name on the dataset with fingerprint,
+            computing it with compute() and storing it if it isn't in the cache
+        """
+        key = self.key(fingerprint, function, params)
+        hit, result = self.get(key)
+        if not hit:
+            result = compute()
+            self.put(key, fingerprint, function, result)
+        return result
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and "-l" == sys.argv[1]:
+        cache = ResultCache(sys.argv[2])
+        for key, entry in sorted(cache.index["entries"].items(), key=lambda item: item[1].used):
+            print("%s %-40s %10d bytes  dataset %s" % (key[:12], entry.function, entry.size, entry.fingerprint[:12]))
+    elif len(sys.argv) > 2 and "-i" == sys.argv[1]:
+        cache = ResultCache(sys.argv[2])
+        if len(sys.argv) > 3:
+            removed = sum(cache.invalidate(cache.fingerprint(path)) for path in sys.argv[3:])
+        else:
+            removed = cache.invalidate()
+        print("removed %d results" % removed)
+    else:
+        print("must specify what action should be taken:\n\t" +
+                "-l cacheFolder (list the cached results)\n\t" +
+                "-i cacheFolder [datasets...] (remove the results of the datasets, or every result)")
+        sys.exit(1)
@@ -0,0 +1,200 @@
+import json
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Mapping
+from os import makedirs
+from os.path import join
+
+from Vote import Vote
+from Representative import Representative
+from partyLine import lineTable, rebellions, DEFAULT_TIE, DEFAULT_MIN_VOTERS
+
+# A roll call store is a folder holding allReps as parallel arrays instead of a pickle of Representative objects.
+# Every rep-vote is one row of the fact columns, sorted by representative (and in the order the rep's votes were added):
+#   repIndex.npy      int32, index into the representatives in meta.json
+#   voteIndex.npy     int32, index into voteIDs.npy
+#   yeaNay.npy        int8, 1 for yea, 0 for nay
+#   partyCode.npy     int16, index into the parties in meta.json
+#   rebellion.npy     bool, whether the rep-vote went against the party line (see partyLine.py)
+#   repOffsets.npy    int64, the rows of representative i are repOffsets[i]:repOffsets[i+1]
+# The vote dimension table:
+#   voteIDs.npy             int32 (number of votes x 3), the (parliament #, session #, vote #) of every vote
+#   resultOffsets.npy       int64, the voteResult of vote i is in rows resultOffsets[i]:resultOffsets[i+1] of the two arrays below
+#   resultParty.npy         int16, party code
+#   resultCounts.npy        int32 (rows x 2), (num yes, num no) of that party
+#   resultLine.npy          int8, the line of that party (YEA, NAY or NO_LINE from partyLine.py)
+# and meta.json holding the party names, the representative dimension table [key, name, constituency, province, country]
+# and the tie and minVoters rules the party lines were worked out with.
+# The party lines and rebellions are worked out for every vote at once when the store is saved
+# All of the arrays are memory mapped when the store is opened, so loading it does almost no work
+STORE_VERSION = 2
+FACT_COLUMNS = ("repIndex", "voteIndex", "yeaNay", "partyCode", "rebellion", "repOffsets")
+VOTE_COLUMNS = ("voteIDs", "resultOffsets", "resultParty", "resultCounts", "resultLine")
+
+def saveRollCallStore(allReps, path, tie=DEFAULT_TIE, minVoters=DEFAULT_MIN_VOTERS):
+    """ Write allReps (a dictionary with values of Representative objects) to a roll call store in the folder at path
+        tie and minVoters are the rules the party lines are worked out with (see partyLine.py)
+    """
+    makedirs(path, exist_ok=True)
+
+    parties = {} # Dict[party name, party code]
+    def partyCode(party):
+        if not party in parties:
+            parties[party] = len(parties)
+        return parties[party]
+
+    votes = {} # Dict[voteID, vote index]
+    voteObjects = []
+    reps = []
+    repIndex = []
+    voteIndex = []
+    yeaNay = []
+    partyCodes = []
+    repOffsets = [0]
+    for i, repKey in enumerate(allReps):
+        rep = allReps[repKey]
+        country = rep.country if isinstance(rep.country, str) else None
+        reps.append([repKey, rep.name, rep.constituency, rep.province, country])
+        for voteOb, repVote, party in rep.votes:
+            if not voteOb.voteID in votes:
+                votes[voteOb.voteID] = len(voteObjects)
+                voteObjects.append(voteOb)
+            repIndex.append(i)
+            voteIndex.append(votes[voteOb.voteID])
+            yeaNay.append(repVote)
+            partyCodes.append(partyCode(party))
+        repOffsets.append(len(repIndex))
+
+    resultOffsets = [0]
+    resultParty = []
+    resultCounts = []
+    for voteOb in voteObjects:
+        for party in voteOb.voteResult:
+            resultParty.append(partyCode(party))
+            resultCounts.append(tuple(voteOb.voteResult[party]))
+        resultOffsets.append(len(resultParty))
+
+    columns = {"repIndex": np.array(repIndex, dtype=np.int32),
+               "voteIndex": np.array(voteIndex, dtype=np.int32),
+               "yeaNay": np.array(yeaNay, dtype=np.int8),
+               "partyCode": np.array(partyCodes, dtype=np.int16),
+               "repOffsets": np.array(repOffsets, dtype=np.int64),
+               "voteIDs": np.array([v.voteID for v in voteObjects], dtype=np.int32).reshape(-1, 3),
+               "resultOffsets": np.array(resultOffsets, dtype=np.int64),
+               "resultParty": np.array(resultParty, dtype=np.int16),
+               "resultCounts": np.array(resultCounts, dtype=np.int32).reshape(-1, 2)}
+    # every party line is worked out once, and every rep-vote is checked against its line at once
+    resultVote = np.repeat(np.arange(len(voteObjects)), np.diff(columns["resultOffsets"]))
+    table = lineTable(resultVote, columns["resultParty"], columns["resultCounts"][:, 0], columns["resultCounts"][:, 1],
+                      len(voteObjects), len(parties), tie, minVoters)
+    columns["resultLine"] = table[resultVote, columns["resultParty"]]
+    columns["rebellion"] = rebellions(columns["yeaNay"], table[columns["voteIndex"], columns["partyCode"]])
+    for name in columns:
+        np.save(join(path, name + ".npy"), columns[name])
+
+    with open(join(path, "meta.json"), "w") as f:
+        f.write(json.dumps({"version": STORE_VERSION, "parties": list(parties), "reps": reps, "tie": tie, "minVoters": minVoters}))
+
+class RollCallStore(Mapping):
+    """
+    A roll call store opened from disk.
+    The fact and vote columns are available as memory mapped numpy arrays (store.yeaNay, store.voteIDs, ...)
+    The store also acts as a read only allReps dictionary: store[repKey] builds the Representative object from the columns,
+    so every function that takes allReps can run on it directly. The most recently used representatives (cacheSize of them) are kept
+    so functions that look up the same representative over and over don't rebuild it every time, but anything that goes through
+    every representative more than once rebuilds all of them on every pass. Analyses that only need the votes read them with
+    repVotes, allVotes and voteParticipants instead, which go straight to the columns
+    """
+    def __init__(self, path, cacheSize=256):
+        """
+        Open the roll call store in the folder at path
+        """
+        with open(join(path, "meta.json")) as f:
+            meta = json.loads(f.read())
+        if meta["version"] != STORE_VERSION:
+            raise ValueError("%s is a version %s roll call store, expected version %d" % (path, meta["version"], STORE_VERSION))
+
+        for name in FACT_COLUMNS + VOTE_COLUMNS:
+            setattr(self, name, np.load(join(path, name + ".npy"), mmap_mode="r"))
+        self.parties = meta["parties"]
+        self.reps = meta["reps"]
+        self.tie = meta["tie"]
+        self.minVoters = meta["minVoters"]
+        self.repPosition = {rep[0]: i for i, rep in enumerate(self.reps)}
+
+        self.voteObjects = [None] * len(self.voteIDs)
+        self.cacheSize = cacheSize
+        self.cache = OrderedDict()
+
+    def vote(self, i):
+        """ Return the Vote object of the ith vote. Every representative shares the same Vote object
+        """
+        if self.voteObjects[i] is None:
+            start, end = self.resultOffsets[i], self.resultOffsets[i+1]
+            voteResult = {}
+            for party, counts in zip(self.resultParty[start:end], self.resultCounts[start:end]):
+                voteResult[self.parties[party]] = [int(counts[0]), int(counts[1])]
+            self.voteObjects[i] = Vote(tuple(int(x) for x in self.voteIDs[i]), voteResult, tie=self.tie, minVoters=self.minVoters)
+        return self.voteObjects[i]
+
+    def representative(self, i):
+        """ Build the Representative object of the ith representative from the columns
+        """
+        repKey, name, constituency, province, country = self.reps[i]
+        rep = Representative(name, constituency, province, country)
+        start, end = self.repOffsets[i], self.repOffsets[i+1]
+        for voteIndex, repVote, party, rebellion in zip(self.voteIndex[start:end].tolist(), self.yeaNay[start:end].tolist(),
+                                                        self.partyCode[start:end].tolist(), self.rebellion[start:end].tolist()):
+            rep.addVote(self.vote(voteIndex), repVote, self.parties[party], rebellion)
+        return rep
+
+    def repVotes(self, repKey):
+        """ Yield (vote object, rep's vote (1 for yea, 0 for nay), party) for every vote of the representative with key repKey,
+            the same as store[repKey].iterVotes() without building the Representative
+        """
+        i = self.repPosition[repKey]
+        start, end = self.repOffsets[i], self.repOffsets[i+1]
+        for voteIndex, repVote, party in zip(self.voteIndex[start:end].tolist(), self.yeaNay[start:end].tolist(), self.partyCode[start:end].tolist()):
+            yield (self.vote(voteIndex), repVote, self.parties[party])
+
+    def allVotes(self):
+        """ Return a dictionary with keys of voteIDs and values of the Vote objects of every vote, in the order they were first seen
+        """
+        return {vote.voteID: vote for vote in map(self.vote, range(len(self.voteIDs)))}
+
+    def voteParticipants(self):
+        """ Return a dictionary with keys of voteIDs and values of a list of (rep key, rep's vote (1 for yea, 0 for nay), party)
+            for everyone who voted in it, in the order they're in the store. The votes are in the order they were first seen
+        """
+        # the rows are sorted by representative, a stable sort by vote keeps them in that order within every vote
+        order = np.argsort(self.voteIndex, kind="stable")
+        voteIndex = np.asarray(self.voteIndex)[order]
+        starts = np.searchsorted(voteIndex, np.arange(len(self.voteIDs) + 1))
+        repKeys = [self.reps[i][0] for i in np.asarray(self.repIndex)[order].tolist()]
+        yeaNays = np.asarray(self.yeaNay)[order].tolist()
+        parties = [self.parties[party] for party in np.asarray(self.partyCode)[order].tolist()]
+        participants = {}
+        for i in range(len(self.voteIDs)):
+            start, end = starts[i], starts[i+1]
+            participants[tuple(int(x) for x in self.voteIDs[i])] = list(zip(repKeys[start:end], yeaNays[start:end], parties[start:end]))
+        return participants
+
+    def __getitem__(self, repKey):
+        if repKey in self.cache:
+            self.cache.move_to_end(repKey)
+            return self.cache[repKey]
+        rep = self.representative(self.repPosition[repKey])
+        self.cache[repKey] = rep
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return rep
+
+    def __iter__(self):
+        for rep in self.reps:
+            yield rep[0]
+
+    def __len__(self):
+        return len(self.reps)
+
+    def __contains__(self, repKey):
+        return repKey in self.repPosition
@@ -0,0 +1,64 @@
+import sys
+import subprocess
+import time
+
+# checks that the analysis entry points start quickly: each module is imported in a fresh python process and timed,
+# and the heavy libraries (scipy, matplotlib, statsmodels, sklearn) must only be imported by the functions that use them
+#   the optional first argument is how many times each import is timed, the fastest is the one compared to the budget (default 5)
+#   the optional second and third arguments are a pickle file (or roll call store) and the name of an analysis;
+#   if they're given the whole analyzeRepresentative.py -o query is timed too (run it once beforehand so the result is cached)
+# exits with 1 if anything is over its budget
+
+# seconds each module is allowed to take to import
+IMPORT_BUDGET = {"analyzeVoteData": 0.5, "analyzeRepresentative": 0.5, "representativeAnalysis": 0.5, "voteMatrix": 0.5}
+# seconds a cached analyzeRepresentative.py -o query is allowed to take from start to finish
+QUERY_BUDGET = 1.0
+HEAVY_MODULES = ("scipy", "matplotlib", "statsmodels", "sklearn")
+
+IMPORT_SCRIPT = """
+import io, sys, time
+from contextlib import redirect_stdout
+sys.argv = ["startupBenchmark"]
+start = time.perf_counter()
+with redirect_stdout(io.StringIO()):
+    import %s
+print(time.perf_counter() - start)
+print(",".join(module for module in %r if module in sys.modules))
+"""
+
+def importTime(module, repeats):
+    """ Return (the fastest time module took to import in a fresh process, the heavy modules it imported)
+    """
+    times = []
+    for i in range(repeats):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT % (module, HEAVY_MODULES)],
+                                capture_output=True, text=True, check=True).stdout.split("\n")
+        times.append(float(output[0]))
+        heavy = [name for name in output[1].split(",") if name]
+    return min(times), heavy
+
+def queryTime(dataPath, analysis, repeats):
+    """ The fastest time a full analyzeRepresentative.py -o query took, from starting python to exiting
+    """
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "analyzeRepresentative.py", "-o", dataPath, analysis], capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    overBudget = False
+    print("%-25s %10s %10s  %s" % ("module", "seconds", "budget", "heavy imports"))
+    for module in IMPORT_BUDGET:
+        seconds, heavy = importTime(module, repeats)
+        overBudget = overBudget or seconds > IMPORT_BUDGET[module] or len(heavy) > 0
+        print("%-25s %10.3f %10.3f  %s" % (module, seconds, IMPORT_BUDGET[module], ", ".join(heavy) or "none"))
+
+    if len(sys.argv) > 3:
+        seconds = queryTime(sys.argv[2], sys.argv[3], repeats)
+        overBudget = overBudget or seconds > QUERY_BUDGET
+        print("%-25s %10.3f %10.3f" % ("-o " + sys.argv[3], seconds, QUERY_BUDGET))
+
+    sys.exit(1 if overBudget else 0)
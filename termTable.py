@@ -0,0 +1,104 @@
+import numpy as np
+from collections import namedtuple
+
+from rollCallStore import RollCallStore
+
+# The votes and rebellions of every representative in every parliament for every party they were in, as columns,
+# and the group-bys the term number analyses in representativeAnalysis.py are built from.
+# The table is built once (straight from the fact columns of a RollCallStore, or from the counts every Representative keeps),
+# and every summary is a sort based group-by over it: the keys are packed into one integer per row, np.unique finds the groups
+# and np.bincount sums them. Groups come out in the order they're first seen, the order the old dictionary loops built them in.
+
+# one row per (representative, parliament, party), in the order each representative's votes were added:
+#   rep, the index of the representative in allReps
+#   parliament, the parliament number
+#   party, the party code, an index into parties
+#   term, which term the parliament was for the representative (0 for their first)
+#   numTerms, how many parliaments the representative was in altogether
+#   numVotes and numRebellions, how many votes they were in and rebelled in
+TermTable = namedtuple("TermTable", ["rep", "parliament", "party", "term", "numTerms", "numVotes", "numRebellions", "parties"])
+
+# every term number analysis, from one TermTable:
+#   byTerm, a list of (votes, rebellions, percent rebellions) for first term representatives, second term representatives, ...
+#   byTermAndParty, a dictionary of (term, party) -> (votes, rebellions, percent rebellions)
+#   byPartySessionTerm, a dictionary of party -> parliament -> term -> [rebellions, votes]
+#   byNumTerms, a dictionary of the number of terms served -> rebellions / votes of the representatives who served that many
+TermSummaries = namedtuple("TermSummaries", ["byTerm", "byTermAndParty", "byPartySessionTerm", "byNumTerms"])
+
+def groupSums(keys, values):
+    """ Group the rows of keys (a list of equal length non negative integer arrays) and sum values (a list of arrays) in every group
+        returns (the keys of every group as a (groups x len(keys)) array, the sums of every group, the first row of every group),
+        with the groups in the order they're first seen
+    """
+    keys = [np.asarray(key, dtype=np.int64) for key in keys]
+    packed = np.ravel_multi_index(keys, [int(key.max()) + 1 if len(key) else 1 for key in keys])
+    _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    groups = rank[inverse.reshape(-1)]
+    sums = [np.bincount(groups, weights=value, minlength=len(order)).round().astype(np.int64) for value in values]
+    return np.stack(keys, axis=1)[first[order]], sums, first[order]
+
+def withTerms(rep, parliament, party, numVotes, numRebellions, parties):
+    """ Build the TermTable from its rows, numbering every representative's parliaments in order
+    """
+    # every (representative, parliament) as one sorted integer, so a representative's parliaments are next to each other in order
+    width = int(parliament.max()) + 1 if len(parliament) else 1
+    repParliaments = np.unique(rep * width + parliament)
+    # a parliament's term is how far it is from the representative's first
+    term = np.searchsorted(repParliaments, rep * width + parliament) - np.searchsorted(repParliaments, rep * width)
+    numTerms = np.bincount(repParliaments // width, minlength=int(rep.max()) + 1 if len(rep) else 0)
+    return TermTable(rep, parliament, party, term, numTerms[rep], numVotes, numRebellions, parties)
+
+def loadTermTable(allReps):
+    """ Build the TermTable of allReps (a dictionary with values of Representative objects, or a RollCallStore)
+        A RollCallStore is grouped straight from its fact columns, without building the Representative objects
+    """
+    if isinstance(allReps, RollCallStore):
+        parliaments = np.asarray(allReps.voteIDs)[:, 0][np.asarray(allReps.voteIndex)]
+        keys, (numVotes, numRebellions), _ = groupSums([allReps.repIndex, parliaments, allReps.partyCode],
+                                                       [np.ones(len(parliaments)), np.asarray(allReps.rebellion)])
+        return withTerms(keys[:, 0], keys[:, 1], keys[:, 2], numVotes, numRebellions, list(allReps.parties))
+
+    partyIndex = {} # Dict[party, code]
+    rows = []
+    for i, repKey in enumerate(allReps):
+        for (parliament, party), (numVotes, numRebellions) in allReps[repKey].parliamentPartyCounts.items():
+            if not party in partyIndex:
+                partyIndex[party] = len(partyIndex)
+            rows.append((i, parliament, partyIndex[party], numVotes, numRebellions))
+    columns = np.array(rows, dtype=np.int64).reshape(-1, 5).T
+    return withTerms(columns[0], columns[1], columns[2], columns[3], columns[4], list(partyIndex))
+
+def termSummaries(allReps):
+    """ Compute every TermSummaries group-by of allReps from one TermTable
+    """
+    table = loadTermTable(allReps)
+    parties = table.parties
+
+    keys, (numVotes, numRebellions), _ = groupSums([table.term], [table.numVotes, table.numRebellions])
+    order = np.argsort(keys[:, 0])
+    byTerm = [(votes, rebellions, rebellions/votes*100) for votes, rebellions in zip(numVotes[order].tolist(), numRebellions[order].tolist())]
+
+    keys, (numVotes, numRebellions), _ = groupSums([table.term, table.party], [table.numVotes, table.numRebellions])
+    byTermAndParty = {(term, parties[party]): (votes, rebellions, rebellions/votes*100)
+                      for (term, party), votes, rebellions in zip(keys.tolist(), numVotes.tolist(), numRebellions.tolist())}
+
+    # nested the way it used to be built: parties in the order they're first seen, then parliaments within the party, then terms
+    keys, (numVotes, numRebellions), first = groupSums([table.party, table.parliament, table.term], [table.numVotes, table.numRebellions])
+    partyKeys, _, partyFirst = groupSums([table.party], [])
+    sessionKeys, _, sessionFirst = groupSums([table.party, table.parliament], [])
+    partyFirst = dict(zip(partyKeys[:, 0].tolist(), partyFirst.tolist()))
+    sessionFirst = dict(zip(map(tuple, sessionKeys.tolist()), sessionFirst.tolist()))
+    order = sorted(range(len(keys)), key=lambda g: (partyFirst[keys[g, 0]], sessionFirst[(keys[g, 0], keys[g, 1])], first[g]))
+    byPartySessionTerm = {}
+    for g in order:
+        party, session, term = keys[g].tolist()
+        byPartySessionTerm.setdefault(parties[party], {}).setdefault(session, {})[term] = [int(numRebellions[g]), int(numVotes[g])]
+
+    keys, (numVotes, numRebellions), _ = groupSums([table.numTerms], [table.numVotes, table.numRebellions])
+    byNumTerms = {numTerms: rebellions / votes for numTerms, votes, rebellions
+                  in sorted(zip(keys[:, 0].tolist(), numVotes.tolist(), numRebellions.tolist()))}
+
+    return TermSummaries(byTerm, byTermAndParty, byPartySessionTerm, byNumTerms)
@@ -0,0 +1,55 @@
+import sys
+from os.path import abspath, dirname
+
+import numpy as np
+import pytest
+
+# the modules live at the top of the repository rather than in a package, so the tests import them from there
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from Representative import Representative
+from Vote import Vote
+from rollCallStore import RollCallStore, saveRollCallStore
+
+def makeRandomReps(seed, numReps=30, parliaments=(41,), votesPerParliament=100, parties=("A", "B", "C"), switchRate=0.5, loyalty=0.9):
+    """ A random allReps of numReps representatives, for checking the analyses against each other
+        Every representative serves a run of the parliaments, and is only in a random share of the votes of those.
+        They switch party about switchRate times a parliament, and vote with most of their party loyalty of the time
+    """
+    rng = np.random.default_rng(seed)
+    reps = {"rep%d" % i: Representative("Rep %d" % i, "Riding %d" % i, "Province", "Canada") for i in range(numReps)}
+    serves = {}
+    for repKey in reps:
+        first = int(rng.integers(len(parliaments)))
+        serves[repKey] = set(parliaments[first:first + int(rng.integers(1, len(parliaments) + 1))])
+    attendance = {repKey: rng.random() for repKey in reps}
+    party = {repKey: parties[rng.integers(len(parties))] for repKey in reps}
+    for parliament in parliaments:
+        for number in range(votesPerParliament):
+            for repKey in reps:
+                if rng.random() < switchRate / votesPerParliament:
+                    party[repKey] = parties[rng.integers(len(parties))]
+            voters = [repKey for repKey in reps if parliament in serves[repKey] and rng.random() < attendance[repKey]]
+            partyYea = {name: rng.random() < 0.5 for name in parties}
+            choices = {repKey: int(partyYea[party[repKey]] != (rng.random() > loyalty)) for repKey in voters}
+            result = {}
+            for repKey in voters:
+                result.setdefault(party[repKey], [0, 0])[1 - choices[repKey]] += 1
+            vote = Vote((parliament, 1, number), result)
+            for repKey in voters:
+                reps[repKey].addVote(vote, choices[repKey], party[repKey])
+    # the readers only make a representative for someone who voted
+    return {repKey: rep for repKey, rep in reps.items() if rep.numVotes > 0}
+
+@pytest.fixture
+def randomReps():
+    return makeRandomReps
+
+@pytest.fixture
+def asStore(tmp_path):
+    """ Save an allReps as a roll call store and open it, to check the analyses read the same from both
+    """
+    def save(allReps):
+        saveRollCallStore(allReps, str(tmp_path / "store"))
+        return RollCallStore(str(tmp_path / "store"))
+    return save
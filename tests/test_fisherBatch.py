@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from fisherBatch import benjaminiHochberg, fisherExact
+
+# fisherExact and benjaminiHochberg are checked against the scipy functions they replace, on random tables and p values
+
+def randomTables(seed, numTables=500):
+    """ numTables random 2x2 tables, from empty ones and ones with a zero row up to tables of a few hundred
+    """
+    rng = np.random.default_rng(seed)
+    tables = rng.integers(0, rng.choice([3, 20, 150], (numTables, 1, 1)), (numTables, 2, 2))
+    tables[:10] = 0
+    tables[10:20, 1] = 0
+    return tables
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_fisherExact_matches_scipy(seed):
+    tables = randomTables(seed)
+    # a small batch size so the tables are split across several batches
+    ratios, pvalues = fisherExact(tables, batchSize=64)
+    for table, ratio, pvalue in zip(tables, ratios, pvalues):
+        expectedRatio, expectedP = stats.fisher_exact(table)
+        assert np.isclose(ratio, expectedRatio, equal_nan=True)
+        assert pvalue == pytest.approx(expectedP, rel=1e-7, abs=1e-12)
+
+def test_fisherExact_rejects_negative():
+    with pytest.raises(ValueError):
+        fisherExact([[1, -1], [2, 3]])
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_benjaminiHochberg_matches_scipy(seed):
+    rng = np.random.default_rng(seed)
+    pvalues = np.concatenate([rng.random(200), rng.random(50) * 0.01, [0.5, 0.5, 0.0, 1.0]])
+    rng.shuffle(pvalues)
+    assert benjaminiHochberg(pvalues) == pytest.approx(stats.false_discovery_control(pvalues))
+
+def test_benjaminiHochberg_skips_nan():
+    pvalues = np.array([0.01, np.nan, 0.04, 0.03, np.nan])
+    adjusted = benjaminiHochberg(pvalues)
+    assert np.isnan(adjusted[[1, 4]]).all()
+    assert adjusted[[0, 2, 3]] == pytest.approx(stats.false_discovery_control(pvalues[[0, 2, 3]]))
+    assert np.isnan(benjaminiHochberg([np.nan])).all()
@@ -0,0 +1,29 @@
+import numpy as np
+
+from Representative import Representative
+from Vote import Vote
+from partyLine import partyLines, rebellions
+
+# With the default rules a rebellion is what Representative.isRebellion has always counted as one
+
+def loopIsRebellion(voteResult, yeaNay):
+    """ Representative.isRebellion before the party lines were worked out with partyLine.py
+    """
+    partyVotedYea = 0
+    if voteResult[0] < voteResult[1]:
+        partyVotedYea = 1
+    return partyVotedYea == yeaNay
+
+def test_default_rules_match_loop():
+    rng = np.random.default_rng(0)
+    yeas = rng.integers(0, 4, 1000)
+    nays = rng.integers(0, 4, 1000)
+    yeaNays = rng.integers(0, 2, 1000)
+    flags = rebellions(yeaNays, partyLines(yeas, nays))
+    assert flags.tolist() == [loopIsRebellion((yea, nay), yeaNay) for yea, nay, yeaNay in zip(yeas, nays, yeaNays)]
+
+def test_party_without_voters_has_a_line():
+    # a paired member is recorded in their party's result as 0 yea, 0 nay, and a nay against it is a rebellion
+    rep = Representative("Rep", "Riding", "Province", "Canada")
+    rep.addVote(Vote((41, 1, 1), {"A": [0, 0], "B": [3, 1]}), 0, "A")
+    assert rep.numRebellions == 1
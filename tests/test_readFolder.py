@@ -0,0 +1,51 @@
+import json
+from pickle import dumps
+
+from readFolder import ParsedVote, readFolder
+
+# Merging the files that changed into a saved dataset has to give exactly the dataset reading every file again gives
+
+def parseJsonFile(voteFile, streaming=False):
+    """ A vote file for the tests: a json dictionary of the voteID, the party summary and the participants of the vote
+    """
+    with open(voteFile) as f:
+        vote = json.load(f)
+    return ParsedVote(tuple(vote["voteID"]), vote["summary"], [tuple(participant) for participant in vote["participants"]], vote["voteID"][0])
+
+def writeVote(folder, number, participants):
+    """ Write vote number of parliament 41 with participants, a list of (rep key, party, 1 for yea or 0 for nay)
+    """
+    summary = {}
+    for repKey, party, yeaNay in participants:
+        summary.setdefault(party, [0, 0])[1 - yeaNay] += 1
+    vote = {"voteID": [41, 1, number], "summary": summary,
+            "participants": [(repKey, repKey.upper(), "Riding " + repKey, "Province " + party, yeaNay, party) for repKey, party, yeaNay in participants]}
+    with open(str(folder / ("41_1_%d.json" % number)), "w") as f:
+        json.dump(vote, f)
+
+def read(folder, manifestFile, allReps=None):
+    return readFolder(str(folder), parseJsonFile, "Canada", manifestFile=str(manifestFile), allReps=allReps)
+
+def test_merge_matches_full_read(tmp_path, capsys):
+    folder = tmp_path / "votes"
+    folder.mkdir()
+    writeVote(folder, 0, [("x", "A", 1), ("p", "A", 1), ("q", "B", 0)])
+    writeVote(folder, 1, [("p", "A", 1), ("q", "B", 1), ("r", "B", 0)])
+    writeVote(folder, 2, [("p", "A", 0), ("r", "B", 0), ("q", "B", 1)])
+    writeVote(folder, 3, [("y", "B", 1), ("x", "A", 0), ("q", "B", 1)])
+    writeVote(folder, 5, [("q", "C", 1), ("r", "B", 1), ("p", "A", 1)])
+    saved = read(folder, tmp_path / "merged.manifest")
+
+    # x is first seen in the file that's removed, so they're now first seen in 41_1_3 after y.
+    # 41_1_2 changes, and a new file brings a new representative and a new party in between the others
+    (folder / "41_1_0.json").unlink()
+    writeVote(folder, 2, [("r", "B", 1), ("p", "A", 0), ("z", "D", 1)])
+    writeVote(folder, 4, [("w", "E", 1), ("p", "A", 1), ("r", "B", 1)])
+    merged = read(folder, tmp_path / "merged.manifest", saved)
+    full = read(folder, tmp_path / "full.manifest")
+
+    assert list(merged) == ["p", "q", "r", "z", "y", "x", "w"]
+    assert [vote.voteID for vote in merged["p"].voteObjects] == [(41, 1, 1), (41, 1, 2), (41, 1, 4), (41, 1, 5)]
+    assert dumps(merged) == dumps(full)
+    # the changed and new files, and the files the representatives of the removed file are now first seen in
+    assert "parsed 4 new or changed files, reused 1" in capsys.readouterr().out
@@ -0,0 +1,22 @@
+import pytest
+
+from repMatrix import loadRepMatrix, pairAgreement, partyName
+from representativeAnalysis import binarySimilarity
+
+# pairAgreement is checked against binarySimilarity, which compares the vote lists of one pair at a time, on random representatives
+
+@pytest.mark.parametrize("fromStore", [False, True])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_pairAgreement_matches_binarySimilarity(seed, fromStore, randomReps, asStore):
+    allReps = randomReps(seed, numReps=40, votesPerParliament=120, loyalty=0.5)
+    if fromStore:
+        allReps = asStore(allReps)
+    # a small block size so the products are split into several blocks
+    agreement = pairAgreement(loadRepMatrix(allReps), blockSize=7)
+    for i, repKey1 in enumerate(agreement.keys):
+        for j, repKey2 in enumerate(agreement.keys):
+            _, _, similar, dissimilar, sameParty, rep1Party, _ = binarySimilarity(allReps, repKey1, repKey2)
+            assert agreement.agreements[i, j] == similar
+            assert agreement.coAttendance[i, j] == similar + dissimilar
+            assert agreement.sameParty[i, j] == sameParty
+            assert partyName(agreement, agreement.party[i, j]) == rep1Party
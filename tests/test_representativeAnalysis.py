@@ -0,0 +1,65 @@
+import pytest
+
+from representativeAnalysis import similarityToParty
+
+# similarityToParty is checked against the loop it replaced, on small datasets where representatives miss votes
+# and often match two parties equally well, so the tie breaking is checked too
+
+def loopSimilarityToParty(allReps):
+    """ similarityToParty as it was before it was done with matrix products
+    """
+    returnDict = {}
+    for repName in allReps:
+        rep = allReps[repName]
+
+        repParty = ""
+
+        parties = {} # contain key of party name, and 2-list of [# similar votes, # different votes]
+        for voteObject in rep.votes:
+            vote = voteObject[0]
+            repVote = voteObject[1]
+            partyForThisVote = voteObject[2]
+
+            if repParty == "":
+                repParty = partyForThisVote
+            elif repParty != partyForThisVote:
+                repParty = "Changed"
+
+            for party in vote.voteResult:
+                if not party in parties:
+                    parties[party] = [0,0]
+                partyVotedYes = 1 if vote.voteResult[party][0] > vote.voteResult[party][1] else 0
+                if repVote == partyVotedYes:
+                    parties[party][0] += 1
+                else:
+                    parties[party][1] += 1
+
+        similarityScore = {}
+        for party in parties:
+            totalVotes = parties[party][0] + parties[party][1]
+            similarityScore[party] = parties[party][0] / totalVotes
+
+        closestParty = ""
+        closestPartyScore = 0
+        for party in similarityScore:
+            if similarityScore[party] > closestPartyScore:
+                closestParty = party
+                closestPartyScore = similarityScore[party]
+
+        # the loop raised a KeyError for a representative who never voted with any party's majority, they're left out now
+        if closestParty == "":
+            continue
+        if repParty != "Changed":
+            if closestParty != repParty:
+                returnDict[repName] = [rep.name, repParty, similarityScore[repParty], closestParty, similarityScore[closestParty]]
+
+    return returnDict
+
+@pytest.mark.parametrize("fromStore", [False, True])
+def test_similarityToParty_matches_loop(fromStore, randomReps, asStore):
+    for seed in range(300):
+        allReps = randomReps(seed, numReps=5, votesPerParliament=6, switchRate=0.3, loyalty=0.7)
+        expected = loopSimilarityToParty(allReps)
+        # the representatives who switched party are only scored by stretch, with keys of (rep, first voteID of the stretch)
+        actual = similarityToParty(asStore(allReps) if fromStore else allReps)
+        assert {key: value for key, value in actual.items() if not isinstance(key, tuple)} == expected, seed
@@ -0,0 +1,158 @@
+import pytest
+
+from termTable import termSummaries
+
+# termSummaries is checked against the loops the term number analyses in representativeAnalysis.py ran before it,
+# on random representatives who serve different numbers of parliaments and sometimes switch party.
+# The loops are the original ones, which walk every representative's votes and check each of them for a rebellion themselves
+
+def loopIsRebellion(voteTuple):
+    """ Representative.isRebellion as the loops used it: the party's line is yea unless more of it voted nay
+    """
+    partyVotedYea = 0
+    party = voteTuple[2]
+    # did the party vote yes
+    if voteTuple[0].voteResult[party][0] < voteTuple[0].voteResult[party][1]:
+        partyVotedYea = 1
+    # check if whether the party voted yea is equal to whether the representative voted yea
+    if partyVotedYea == voteTuple[1]:
+        return True
+    else:
+        return False
+
+def loopByTerm(allReps):
+    """ rebellionsByTermNumber
+    """
+    terms = []
+    for rep in allReps:
+        rebsInTerm = {} # will be filled with keys of parliament numbers and values of tuples (number of votes in term, number of rebellions in term)
+        for vote in allReps[rep].votes:
+            parliamentNumber = vote[0].voteID[0]
+            if not parliamentNumber in rebsInTerm:
+                rebsInTerm[parliamentNumber] = [0,0]
+            rebsInTerm[parliamentNumber][0] += 1
+            if loopIsRebellion(vote):
+                rebsInTerm[parliamentNumber][1] += 1
+
+        while len(terms) < len(rebsInTerm):
+            terms.append([])
+        # add this representatives behaviour in their nth term to the appropriate list in 'terms'
+        for par, sessInGov in zip(sorted(rebsInTerm.keys()), range(len(rebsInTerm))):
+            terms[sessInGov].append(rebsInTerm[par])
+
+    # now summarize terms in terms of total percentages
+    termSummary = []
+    for entry in terms:
+        totalVotes = 0
+        totalRebellions = 0
+        for rep in entry:
+            totalVotes += rep[0]
+            totalRebellions += rep[1]
+        termSummary.append((totalVotes, totalRebellions, totalRebellions/totalVotes*100))
+    return termSummary
+
+def loopByTermAndParty(allReps):
+    """ rebellionsByTermAndParty
+    """
+    partyTerm = {} # dictionary with keys of (term number, party) and values of (total number of votes, total number of rebellions)
+    for rep in allReps:
+        rebsInTerm = {} # will be filled with keys of (parliament number, party) values of [number of votes in term, number of rebellions in term]
+        for vote in allReps[rep].votes:
+            parliamentNumber = vote[0].voteID[0]
+            party = vote[2]
+            if not (parliamentNumber,party) in rebsInTerm:
+                rebsInTerm[(parliamentNumber, party)] = [0,0]
+            rebsInTerm[(parliamentNumber, party)][0] += 1
+            if loopIsRebellion(vote):
+                rebsInTerm[(parliamentNumber, party)][1] += 1
+
+        # get all parliaments this member has participated in
+        parliamentToTerm = {}
+        termNumber = 0
+        for parNum, party in sorted(rebsInTerm.keys()):
+            if not parNum in parliamentToTerm:
+                parliamentToTerm[parNum] = termNumber
+                termNumber += 1
+
+        for parNumber, party in rebsInTerm:
+            currentTerm = parliamentToTerm[parNumber]
+            if not (currentTerm, party) in partyTerm:
+                partyTerm[(currentTerm, party)] = []
+
+            partyTerm[(currentTerm, party)].append(rebsInTerm[(parNumber, party)])
+
+    # now summarize terms
+    termSummary = {}
+    for entry in partyTerm:
+        totalVotes = 0
+        totalRebellions = 0
+        for rep in partyTerm[entry]:
+            totalVotes += rep[0]
+            totalRebellions += rep[1]
+        termSummary[entry] = (totalVotes, totalRebellions, totalRebellions/totalVotes*100)
+    return termSummary
+
+def loopByPartySessionTerm(allReps):
+    """ The data termPartyAccountForYear fit its regressions to (it sorted rep.sessionsInGov in place, a sorted copy is used here)
+    """
+    # Dict[party, Dict[session, Dict[term number, (num rebellions, num votes)]]]
+    partyData = {}
+    for repName in allReps:
+        rep = allReps[repName]
+        sessionsInGov = sorted(rep.sessionsInGov)
+        for vote in rep.votes:
+            party = vote[2]
+            if not party in partyData:
+                partyData[party] = {}
+            currentParty = partyData[party]
+            session = vote[0].voteID[0]
+            termNum = sessionsInGov.index(session)
+            if not session in currentParty:
+                currentParty[session] = {}
+            if not termNum in currentParty[session]:
+                currentParty[session][termNum] = [0,0]
+            currentParty[session][termNum][1] += 1
+            if loopIsRebellion(vote):
+                currentParty[session][termNum][0] += 1
+    return partyData
+
+def loopByNumTerms(allReps):
+    """ repsByNumTimesInGov, counting the votes and rebellions from every vote.
+        The loop added the rebellions to the votes too, so every rate was 1.0; this divides by the votes the way it does now
+    """
+    # categorize representatives by how many terms they've served
+    timesInGov = {}
+    for rep in allReps:
+        numTerms = len({vote[0].voteID[0] for vote in allReps[rep].votes})
+        if not numTerms in timesInGov:
+            timesInGov[numTerms] = []
+        timesInGov[numTerms].append(allReps[rep])
+
+    percentRebellions = {}
+    for key in sorted(list(timesInGov.keys())):
+        totalRebellions = 0
+        totalVotes = 0
+        for rep in timesInGov[key]:
+            for vote in rep.votes:
+                totalRebellions += loopIsRebellion(vote)
+                totalVotes += 1
+        average = totalRebellions / totalVotes
+        percentRebellions[key] = average
+    return percentRebellions
+
+def nestedItems(value):
+    """ The items of value and every dictionary inside it, in order, so that the order the groups come out in is compared too
+    """
+    if isinstance(value, dict):
+        return [(key, nestedItems(value[key])) for key in value]
+    return value
+
+@pytest.mark.parametrize("fromStore", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_termSummaries_matches_loops(seed, fromStore, randomReps, asStore):
+    allReps = randomReps(seed, parliaments=(38, 39, 40, 41, 42), votesPerParliament=25, switchRate=0.3)
+    summaries = termSummaries(asStore(allReps) if fromStore else allReps)
+    assert summaries.byTerm == pytest.approx(loopByTerm(allReps))
+    assert nestedItems(summaries.byTermAndParty) == nestedItems(loopByTermAndParty(allReps))
+    assert nestedItems(summaries.byPartySessionTerm) == nestedItems(loopByPartySessionTerm(allReps))
+    assert nestedItems(summaries.byNumTerms) == nestedItems(loopByNumTerms(allReps))
@@ -0,0 +1,71 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+import pytest
+
+import analyzeVoteData
+import voteMatrix
+from voteMatrix import loadVoteMatrix
+
+# The VoteMatrix metrics are checked against the loop versions in analyzeVoteData.py on small random vote summaries
+
+def randomVotes(seed, numVotes=300, parties=("A", "B", "C", "D"), parliaments=(38, 39, 40, 41)):
+    """ numVotes party summaries in the format analyzeVoteData.py reads. Not every party is in every vote,
+        and some parties have no one voting, so the empty cases are covered too
+    """
+    rng = np.random.default_rng(seed)
+    votes = []
+    for parliament in sorted(rng.choice(parliaments, numVotes).tolist()):
+        vote = {"Parliament": parliament}
+        for party in parties:
+            if rng.random() < 0.8:
+                size = int(rng.integers(0, 40))
+                yea = int(rng.binomial(size, rng.choice([0.05, 0.5, 0.95])))
+                vote[party] = [yea, size - yea]
+        votes.append(vote)
+    return votes
+
+def assertSame(expected, actual):
+    """ expected == actual, with floats (and nan) compared to within rounding
+    """
+    if isinstance(expected, dict):
+        assert list(expected) == list(actual)
+        for key in expected:
+            assertSame(expected[key], actual[key])
+    elif isinstance(expected, (tuple, list)): # linregress results are tuples too
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assertSame(a, b)
+    else:
+        assert np.isclose(expected, actual, equal_nan=True)
+
+METRICS = ("averageRebellions", "averageRebellionsPerParty", "averageRebellionsPerParliament", "distributionOfRebellions",
+           "fitBinomial", "rebellionsChangeResult", "partySize", "regressOnRebPerParliament", "regressOnClosenessOfSession")
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("metric", METRICS)
+def test_matches_loops(metric, seed):
+    votes = randomVotes(seed)
+    with redirect_stdout(io.StringIO()):
+        expected = getattr(analyzeVoteData, metric)(votes)
+    actual = getattr(voteMatrix, metric)(loadVoteMatrix(votes))
+    assertSame(expected, actual)
+
+def test_rebPerPartyAndParliament():
+    votes = randomVotes(3)
+    table = voteMatrix.rebPerPartyAndParliament(loadVoteMatrix(votes))
+    assert table[0] == ["Time", "A", "B", "C", "D"]
+    for row in table[1:]:
+        for column, party in enumerate(table[0][1:], 1):
+            partyVotes = [vote[party] for vote in votes if vote["Parliament"] == row[0] and party in vote]
+            total = sum(yea + nay for yea, nay in partyVotes)
+            rebellions = sum(min(yea, nay) for yea, nay in partyVotes)
+            assert row[column] == pytest.approx(rebellions / total * 100 if total else -1)
+
+def test_runMetrics_one_pass():
+    votes = randomVotes(4)
+    # a generator can only be read once, so every metric has to come from the same pass
+    results = analyzeVoteData.runMetrics(vote for vote in votes)
+    assert list(results) == list(analyzeVoteData.REPORT_METRICS)
+    assertSame(voteMatrix.averageRebellions(loadVoteMatrix(votes)), results["averageRebellions"])
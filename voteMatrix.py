@@ -0,0 +1,495 @@
+import numpy as np
+from array import array
+from collections import OrderedDict, Counter, namedtuple
+
+from voteStream import iterVotes
+from fisherBatch import fisherExact, benjaminiHochberg
+from bootstrap import confidenceIntervals
+from figures import regressionFigure
+from lazyImports import stats
+
+# Vectorized versions of the party level analysis in analyzeVoteData.py.
+# Instead of walking a list of {"Parliament": n, party: [yea, nay], ...} dictionaries, the votes are loaded once
+# into dense arrays with one row per vote and one column per party, and every statistic is computed with array operations.
+# Each function here gives the same result as the function with the same name in analyzeVoteData.py (without drawing any plots)
+# The per-vote quantities the functions share (totals, rebels, margins, ...) are computed once per VoteMatrix and then reused,
+# so running many of them on the same matrix (see runMetrics in analyzeVoteData.py) only does that work once
+
+class VoteMatrix(object):
+    """
+    Every vote of a country as dense arrays.
+    Contains self.parties, the party names in the order they first appear, one per column
+    Contains self.parliaments, the parliament number of every vote (int array, one per row)
+    Contains self.yea and self.nay, how many representatives of each party voted yes and no (int arrays, votes x parties)
+    Contains self.present, whether the party was listed in the vote at all (bool array, votes x parties)
+    Contains self.cache, the quantities and results that have already been computed from the matrix
+    """
+    def __init__(self, parties, parliaments, yea, nay, present):
+        self.parties = parties
+        self.parliaments = parliaments
+        self.yea = yea
+        self.nay = nay
+        self.present = present
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.parliaments)
+
+    def cached(self, name, compute):
+        """ Return compute() the first time name is asked for, and the same value every time after that
+        """
+        if not name in self.cache:
+            self.cache[name] = compute()
+        return self.cache[name]
+
+    def totals(self):
+        """ how many representatives of each party voted in each vote (votes x parties)
+        """
+        return self.cached("totals", lambda: self.yea + self.nay)
+
+    def rebels(self):
+        """ how many representatives of each party voted against the party's majority in each vote (votes x parties)
+        """
+        return self.cached("rebels", lambda: np.minimum(self.yea, self.nay))
+
+    def voteTotals(self):
+        """ how many representatives voted in each vote
+        """
+        return self.cached("voteTotals", lambda: self.totals().sum(axis=1))
+
+    def voteRebels(self):
+        """ how many representatives voted against their party's majority in each vote
+        """
+        return self.cached("voteRebels", lambda: self.rebels().sum(axis=1))
+
+    def voteRates(self):
+        """ the fraction of representatives that voted against their party's majority in each vote (nan if nobody voted)
+        """
+        return self.cached("voteRates", lambda: rebellionRates(self.voteTotals(), self.voteRebels()))
+
+    def margins(self):
+        """ the margin of victory of each vote (|yeas - nays|)
+        """
+        return self.cached("margins", lambda: np.abs(self.yea.sum(axis=1) - self.nay.sum(axis=1)))
+
+    def parliamentsInOrder(self, rows=None):
+        """ the parliament numbers of the votes in rows (every vote by default) in the order they first appear
+        """
+        parliaments = self.parliaments if rows is None else self.parliaments[rows]
+        unique, firstIndex = np.unique(parliaments, return_index=True)
+        return unique[np.argsort(firstIndex)]
+
+def loadVoteMatrix(voteData):
+    """ Turn the votes in voteData (any iterable of {"Parliament": n, party: [yea, nay], ...} dictionaries) into a VoteMatrix
+        The votes are only iterated over once, and are kept as compact arrays rather than python objects while they're read,
+        so voteData can be a stream of votes (see voteStream.py) that never sits in memory as a whole
+    """
+    partyIndex = {} # Dict[party, column]
+    parliaments = array("q")
+    voteRows = array("q")
+    partyColumns = array("q")
+    yeaCounts = array("q")
+    nayCounts = array("q")
+    for row, vote in enumerate(voteData):
+        parliaments.append(vote["Parliament"])
+        for party in vote:
+            if party == "Parliament":
+                continue
+            if not party in partyIndex:
+                partyIndex[party] = len(partyIndex)
+            voteRows.append(row)
+            partyColumns.append(partyIndex[party])
+            yeaCounts.append(vote[party][0])
+            nayCounts.append(vote[party][1])
+
+    shape = (len(parliaments), len(partyIndex))
+    yea = np.zeros(shape, dtype=np.int64)
+    nay = np.zeros(shape, dtype=np.int64)
+    present = np.zeros(shape, dtype=bool)
+    voteRows = np.frombuffer(voteRows, dtype=np.int64)
+    partyColumns = np.frombuffer(partyColumns, dtype=np.int64)
+    yea[voteRows, partyColumns] = np.frombuffer(yeaCounts, dtype=np.int64)
+    nay[voteRows, partyColumns] = np.frombuffer(nayCounts, dtype=np.int64)
+    present[voteRows, partyColumns] = True
+    return VoteMatrix(list(partyIndex), np.frombuffer(parliaments, dtype=np.int64).copy(), yea, nay, present)
+
+def loadVoteMatrixFile(path):
+    """ Load a vote summary file (canadaVotes.json, houseVotes.json, or a JSON Lines file) into a VoteMatrix, streaming the votes from it
+    """
+    return loadVoteMatrix(iterVotes(path))
+
+def rebellionRates(totals, rebels):
+    """ rebels / totals, with nan wherever totals is 0
+    """
+    rates = np.full(totals.shape, np.nan)
+    np.divide(rebels, totals, out=rates, where=totals != 0)
+    return rates
+
+def averageRebellions(matrix):
+    rates = matrix.voteRates()
+    return {"mean" : np.nanmean(rates) * 100,
+            "variance" : np.nanvar(rates) * 100}
+
+def averageRebellionsPerParty(matrix):
+    rates = rebellionRates(matrix.totals(), matrix.rebels())
+    results = {}
+    for column, party in enumerate(matrix.parties):
+        partyRates = rates[matrix.present[:, column], column]
+        results[party] = {"mean" : np.nanmean(partyRates) * 100,
+                          "variance" : np.nanvar(partyRates) * 100}
+    return results
+
+def averageRebellionsPerParliament(matrix):
+    rates = matrix.voteRates()
+    result = OrderedDict()
+    for parl in np.unique(matrix.parliaments):
+        parliamentRates = rates[matrix.parliaments == parl]
+        result[int(parl)] = {"mean" : np.nanmean(parliamentRates) * 100,
+                             "variance" : np.nanvar(parliamentRates) * 100}
+    return result
+
+def distributionOfRebellions(matrix):
+    numRebels, counts = np.unique(matrix.voteRebels(), return_counts=True)
+    return OrderedDict((int(rebels), int(count) / len(matrix)) for rebels, count in zip(numRebels, counts))
+
+def rebellionsChangeResult(matrix):
+    totals = matrix.totals()
+    # the result if every party voted as a block
+    unityVotesFor = np.where(matrix.yea > matrix.nay, totals, 0).sum(axis=1)
+    unityVotesAgainst = np.where(matrix.yea < matrix.nay, totals, 0).sum(axis=1)
+    unityResult = unityVotesFor > unityVotesAgainst
+    actualResult = matrix.yea.sum(axis=1) > matrix.nay.sum(axis=1)
+
+    numVotes = len(matrix)
+    numChanges = int(np.count_nonzero(unityResult != actualResult))
+    return (numChanges, numVotes, numChanges/numVotes)
+
+def parliamentSums(matrix, values):
+    """ Add up the rows of values (votes x parties) that belong to the same parliament
+        Return (the sorted parliament numbers, the sums with one row per parliament)
+    """
+    parliaments, rowParliament = np.unique(matrix.parliaments, return_inverse=True)
+    sums = np.zeros((len(parliaments), values.shape[1]), dtype=values.dtype)
+    np.add.at(sums, rowParliament, values)
+    return parliaments, sums
+
+def rebPerPartyAndParliament(matrix):
+    """ The rebellion percentage of every party in every parliament, as a table with the headers in its first row
+        print it with tabulate(table[1:], headers=table[0])
+    """
+    parliaments, totalVotes = parliamentSums(matrix, matrix.totals())
+    _, totalRebellions = parliamentSums(matrix, matrix.rebels())
+
+    # convert to tabulate-able table, with -1 where the party had no votes in the parliament
+    partyColumns = sorted(np.flatnonzero(totalVotes.any(axis=0)), key=lambda column: matrix.parties[column])
+    outputTable = []
+    for row, parl in enumerate(parliaments):
+        outputRow = [int(parl)]
+        for column in partyColumns:
+            if totalVotes[row, column] != 0:
+                outputRow.append(int(totalRebellions[row, column]) / int(totalVotes[row, column]) * 100)
+            else:
+                outputRow.append(-1)
+        outputTable.append(outputRow)
+    partySet = [matrix.parties[column] for column in partyColumns]
+    partySet.insert(0,"Time")
+    outputTable.insert(0, partySet)
+    return outputTable
+
+def withConfidenceIntervals(results, groups, level, replicates, seed, workers):
+    """ Add the bootstrap confidence interval of the mean of each group of rates (in percent, like the means) to the matching result
+        results and groups are in the same order; every result dictionary gets a "ci" key of (low, high)
+    """
+    intervals = confidenceIntervals(groups, level, replicates, seed, workers)
+    for result, (low, high) in zip(results, intervals):
+        result["ci"] = (low * 100, high * 100)
+
+def bootstrapAverageRebellions(matrix, replicates=10000, level=0.95, seed=0, workers=1):
+    """ averageRebellions with a bootstrap confidence interval of the mean ("ci") added
+    """
+    result = averageRebellions(matrix)
+    withConfidenceIntervals([result], [matrix.voteRates()], level, replicates, seed, workers)
+    return result
+
+def bootstrapAverageRebellionsPerParty(matrix, replicates=10000, level=0.95, seed=0, workers=1):
+    """ averageRebellionsPerParty with a bootstrap confidence interval of each party's mean ("ci") added
+    """
+    results = averageRebellionsPerParty(matrix)
+    rates = rebellionRates(matrix.totals(), matrix.rebels())
+    groups = [rates[matrix.present[:, column], column] for column in range(len(matrix.parties))]
+    withConfidenceIntervals([results[party] for party in matrix.parties], groups, level, replicates, seed, workers)
+    return results
+
+def bootstrapAverageRebellionsPerParliament(matrix, replicates=10000, level=0.95, seed=0, workers=1):
+    """ averageRebellionsPerParliament with a bootstrap confidence interval of each parliament's mean ("ci") added
+    """
+    results = averageRebellionsPerParliament(matrix)
+    rates = matrix.voteRates()
+    groups = [rates[matrix.parliaments == parl] for parl in results]
+    withConfidenceIntervals(list(results.values()), groups, level, replicates, seed, workers)
+    return results
+
+def binomialMSEGrid(prunedData, pValues, i, batchSize=8192):
+    """ Same as binomialMSE in analyzeVoteData.py, but for every p in pValues at once
+        The pmf is evaluated for a batch of p values at a time as a (len(prunedData) x batch) matrix
+    """
+    actual = np.array(prunedData, dtype=float)[:, np.newaxis]
+    numbers = np.arange(0, len(prunedData))[:, np.newaxis]
+    total = np.sum(prunedData)
+    errors = np.empty(len(pValues))
+    for start in range(0, len(pValues), batchSize):
+        batch = pValues[start:start+batchSize]
+        pmf = stats.binom.pmf(numbers, i, batch[np.newaxis, :]) * total
+        errors[start:start+batchSize] = ((actual - pmf) ** 2).sum(axis=0)
+    return errors
+
+def pruneRebellionCounts(numRebellions):
+    """ Histogram of the number of rebellions per vote, starting from 0 rebellions and stopping after the first count that's 5 or less
+        chi square test will only work when the values are greater than 5 so we'll prune the data set a touch here
+        returns (prunedData, i) where prunedData[k] is how many votes had k rebellions, and i = len(prunedData)
+    """
+    counts = Counter(numRebellions)
+    prunedData = []
+    greaterThan5 = True
+    i = 0
+    while greaterThan5:
+        theCount = counts[i]
+        if theCount <= 5:
+            greaterThan5 = False
+        prunedData.append(theCount)
+        i += 1
+    return prunedData, i
+
+def fitBinomialPruned(prunedData):
+    """ Find the p of the binomial distribution that best fits (least squared error) the pruned histogram of rebellions per vote
+        returns (best p, squared error of it)
+    """
+    i = len(prunedData)
+    # idea is to check a bunch of different MSE's and pick the best
+    numTests = 100000
+    pValues = np.arange(0,numTests+1) / numTests
+    errors = binomialMSEGrid(prunedData, pValues, i)
+
+    # a stable sort keeps the smallest p first when errors are tied
+    bestP = pValues[np.argsort(errors, kind="stable")[0:100]]
+    minVals = bestP.min()
+    maxVals = bestP.max()
+
+    # then search again between the best 100 p values with a finer grid
+    pValues = np.arange(minVals,maxVals, (maxVals-minVals) /numTests )
+    errors = binomialMSEGrid(prunedData, pValues, i)
+
+    order = np.argsort(errors, kind="stable")
+    return (pValues[order[0]], errors[order[0]])
+
+def fitBinomial(matrix):
+    prunedData, i = pruneRebellionCounts(matrix.voteRebels().tolist())
+    return fitBinomialPruned(prunedData)
+
+def regressOnRebPerParliament(matrix, figures=None):
+    perParliament = matrix.cached("averageRebellionsPerParliament", lambda: averageRebellionsPerParliament(matrix))
+    parliamentNumbers = list(perParliament.keys())
+    means = [perParliament[key]["mean"] for key in perParliament]
+    minParliament = min(parliamentNumbers)
+    parliamentNumbers = [x-minParliament for x in parliamentNumbers]
+    regress = stats.linregress(parliamentNumbers, means)
+    if figures is not None:
+        figures.append(regressionFigure("regressOnRebPerParliament", parliamentNumbers, means, regress, "rebellions per parliament"))
+    return regress
+
+def partySize(matrix):
+    totals = matrix.totals()
+    rebels = matrix.rebels()
+    sizeToRebRatio = []
+    for parl in matrix.parliamentsInOrder():
+        rows = matrix.parliaments == parl
+        present = matrix.present[rows]
+        # parties in the order they first appear in this parliament
+        firstRow = np.where(present.any(axis=0), present.argmax(axis=0), len(present))
+        for column in np.argsort(firstRow, kind="stable"):
+            numVotes = int(np.count_nonzero(present[:, column]))
+            if numVotes == 0:
+                continue
+            totalRepVotes = int(totals[rows, column].sum())
+            rebellions = int(rebels[rows, column].sum())
+            # a party that was in votes without any of its representatives voting has no size
+            if totalRepVotes == 0:
+                continue
+
+            numberOfReps = totalRepVotes / numVotes
+            rebellionPercentage = rebellions / totalRepVotes
+            sizeToRebRatio.append((numberOfReps, rebellionPercentage))
+
+    # split into x and y so this doesn't rely on linregress accepting a single (N x 2) argument
+    sizes, rebellionPercentages = zip(*sizeToRebRatio)
+    return stats.linregress(sizes, rebellionPercentages)
+
+def regressOnClosenessOfSession(matrix, figures=None):
+    voteTotals = matrix.voteTotals()
+    voted = voteTotals != 0
+    margins = (matrix.margins()[voted] / voteTotals[voted]).tolist()
+    rates = (matrix.voteRebels()[voted] / voteTotals[voted]).tolist()
+    parliaments = matrix.parliaments[voted].tolist()
+
+    # margin of victory / number of voters and rebellions / number of voters of every vote, grouped by parliament
+    parliamentMargins = OrderedDict((int(parl), []) for parl in matrix.parliamentsInOrder(voted))
+    parlRebellions = OrderedDict((parl, []) for parl in parliamentMargins)
+    for parl, margin, rate in zip(parliaments, margins, rates):
+        parliamentMargins[parl].append(margin)
+        parlRebellions[parl].append(rate)
+    parliamentAverages = {parl: sum(parliamentMargins[parl]) / len(parliamentMargins[parl]) for parl in parliamentMargins}
+    rebAverages = OrderedDict((parl, sum(parlRebellions[parl]) / len(parlRebellions[parl])) for parl in parlRebellions)
+
+    # now get the expected number of rebellions in that term
+    regress = matrix.cached("regressOnRebPerParliament", lambda: regressOnRebPerParliament(matrix))
+    slope, intercept = regress[0], regress[1]
+    # when the regression was done it normalized the intercept to be the first parliament
+    minParliament = min(rebAverages.keys())
+
+    closeness = []
+    adjustedRebellions = []
+    for parl in rebAverages:
+        newParNum = parl-minParliament
+        adjustedRate = intercept + newParNum * slope
+        adjustedRebellions.append(rebAverages[parl]*100 - adjustedRate)
+        closeness.append(parliamentAverages[parl])
+
+    regress = stats.linregress(closeness, adjustedRebellions)
+    if figures is not None:
+        figures.append(regressionFigure("regressOnClosenessOfSession", closeness, adjustedRebellions, regress, "rebellions by closeness of session"))
+    return regress
+
+def regressionFigures(matrix):
+    """ The figures of regressOnRebPerParliament and regressOnClosenessOfSession as a list of FigureSpecs (see figures.py)
+        They're returned like any other metric so they can be cached, and drawn once every computation is done
+    """
+    figures = []
+    regressOnRebPerParliament(matrix, figures)
+    regressOnClosenessOfSession(matrix, figures)
+    return figures
+
+# the linregress of every pair of parties in one parliament, as (parties x parties) arrays.
+# Entry [a, b] is linregress(values of party a, values of party b), so slope and intercept are of b regressed on a,
+# and rvalue, pvalue (two sided) and stderr are the same as what linregress gives for that pair
+PartyPairs = namedtuple("PartyPairs", ["parliament", "parties", "slope", "intercept", "rvalue", "pvalue", "stderr", "intercept_stderr"])
+
+def pairwiseRegression(values):
+    """ linregress(values[:, a], values[:, b]) for every pair of columns a, b of values (observations x columns) at once
+        Columns with no variance give nan slopes instead of raising like linregress does
+        returns (slope, intercept, rvalue, pvalue, stderr, intercept_stderr), each a (columns x columns) array
+    """
+    n = values.shape[0]
+    means = values.mean(axis=0)
+    centered = values - means
+    # cov[a, b] = mean((a - mean(a)) * (b - mean(b))), the ssxym of every pair (ssxm and ssym are on the diagonal)
+    cov = centered.T @ centered / n
+    ss = np.diag(cov)
+    ssxm = ss[:, np.newaxis]
+    ssym = ss[np.newaxis, :]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        noVariance = (ssxm == 0) | (ssym == 0)
+        r = np.where(noVariance, np.where(cov == 0, np.nan, 0.0), cov / np.sqrt(ssxm * ssym))
+        r = np.clip(r, -1.0, 1.0)
+        slope = cov / ssxm
+        intercept = means[np.newaxis, :] - slope * means[:, np.newaxis]
+        if n == 2:
+            pvalue = np.where(values[0][np.newaxis, :] == values[1][np.newaxis, :], 1.0, 0.0) * np.ones_like(r)
+            stderr = np.zeros_like(r)
+            interceptStderr = np.zeros_like(r)
+        else:
+            df = n - 2
+            t = r * np.sqrt(df / ((1.0 - r + 1e-20) * (1.0 + r + 1e-20)))
+            pvalue = 2 * stats.t.sf(np.abs(t), df)
+            stderr = np.sqrt((1 - r**2) * ssym / ssxm / df)
+            interceptStderr = stderr * np.sqrt(ssxm + means[:, np.newaxis]**2)
+    return slope, intercept, r, pvalue, stderr, interceptStderr
+
+def parliamentRebellionRates(matrix, binary=False):
+    """ For every parliament (in the order they first appear) yield (parliament, columns, rates)
+        columns are the parties with more than 5 reps voting in the first vote of the parliament, and
+        rates (votes in the parliament x columns) is the fraction of the party that rebelled in each vote, 0 if the party didn't vote.
+        If binary is set rates is instead 1 if anyone in the party rebelled and 0 otherwise
+    """
+    totals = matrix.totals()
+    rebels = matrix.rebels()
+    for parl in matrix.parliamentsInOrder():
+        rows = np.flatnonzero(matrix.parliaments == parl)
+        # if the party has more than 5 reps then count them
+        columns = np.flatnonzero(matrix.present[rows[0]] & (totals[rows[0]] > 5))
+        partyTotals = totals[np.ix_(rows, columns)]
+        partyRebels = rebels[np.ix_(rows, columns)]
+        if binary:
+            rates = (partyRebels != 0).astype(float)
+        else:
+            rates = rebellionRates(partyTotals, partyRebels)
+            rates[partyTotals == 0] = 0
+        yield int(parl), columns, rates
+
+def rebellionCorrelation(matrix, binary=False):
+    """ The linregress between the rebellion rates of every pair of parties in every parliament (see parliamentRebellionRates)
+        returns a list of PartyPairs, one per parliament
+    """
+    results = []
+    for parl, columns, rates in parliamentRebellionRates(matrix, binary):
+        regression = pairwiseRegression(rates)
+        results.append(PartyPairs(parl, [matrix.parties[column] for column in columns], *regression))
+    return results
+
+def partyLines(matrix):
+    """ The side each party took in each vote: 1 if more of it voted yea, -1 if more voted nay, 0 for ties and parties that didn't vote
+        (votes x parties)
+    """
+    return matrix.cached("partyLines", lambda: np.sign(matrix.yea - matrix.nay))
+
+def partyCorrelation(matrix):
+    """ How often every pair of parties took the same side of a vote, out of the votes where both took a side
+        returns (party names, (parties x parties) array of the fraction of votes they agreed on, nan if they never both took a side)
+    """
+    lines = partyLines(matrix)
+    yeas = (lines == 1).astype(np.int64)
+    nays = (lines == -1).astype(np.int64)
+    sided = yeas + nays
+    together = yeas.T @ yeas + nays.T @ nays
+    bothVoted = sided.T @ sided
+    agreement = rebellionRates(bothVoted, together)
+    return list(matrix.parties), agreement
+
+# the fisher exact test between the binary rebellions of every pair of parties in one parliament, as (parties x parties) arrays.
+# Entry [a, b] is fisher_exact([[votes a rebelled in, votes b rebelled in], [votes a didn't, votes b didn't]]),
+# and qvalue is its p value adjusted for the false discovery rate across every pair in every parliament
+FisherPairs = namedtuple("FisherPairs", ["parliament", "parties", "oddsratio", "pvalue", "qvalue"])
+
+def rebellionFisher(matrix):
+    """ The fisher exact test between whether anyone rebelled in every pair of parties in every parliament (see parliamentRebellionRates)
+        Each unordered pair is only tested once, since swapping the parties just inverts the odds ratio,
+        and the tables of every parliament are tested together in one batch (see fisherBatch.py)
+        returns a list of FisherPairs, one per parliament
+    """
+    parliaments = []
+    tables = []
+    for parl, columns, rebelled in parliamentRebellionRates(matrix, binary=True):
+        rebelCounts = rebelled.sum(axis=0).astype(np.int64)
+        calmCounts = len(rebelled) - rebelCounts
+        a, b = np.triu_indices(len(columns), 1)
+        tables.append(np.stack([np.stack([rebelCounts[a], rebelCounts[b]], axis=1),
+                                np.stack([calmCounts[a], calmCounts[b]], axis=1)], axis=1))
+        parliaments.append((parl, columns, a, b))
+
+    oddsratios, pvalues = fisherExact(np.concatenate(tables) if tables else np.zeros((0, 2, 2)))
+    qvalues = benjaminiHochberg(pvalues)
+
+    results = []
+    start = 0
+    for parl, columns, a, b in parliaments:
+        end = start + len(a)
+        shape = (len(columns), len(columns))
+        oddsratio, pvalue, qvalue = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        oddsratio[a, b] = oddsratios[start:end]
+        with np.errstate(divide="ignore"):
+            oddsratio[b, a] = 1 / oddsratios[start:end]
+        pvalue[a, b] = pvalue[b, a] = pvalues[start:end]
+        qvalue[a, b] = qvalue[b, a] = qvalues[start:end]
+        results.append(FisherPairs(parl, [matrix.parties[column] for column in columns], oddsratio, pvalue, qvalue))
+        start = end
+    return results
@@ -0,0 +1,118 @@
+import sys
+import json
+from os import remove, replace
+
+# Reads and writes vote summary files ({"Parliament": n, party: [yea, nay], ...} per vote) one vote at a time,
+# so the memory used doesn't grow with the size of the file.
+# JSON Lines (one vote per line, .jsonl) is the on disk format going forward, but the older files holding a single json array
+# (canadaVotes.json, houseVotes.json, ...) are read incrementally as well.
+# Converts an array file into a JSON Lines file when run directly:
+#   the first argument should be the path of the json array file
+#   the second argument should be the path of the JSON Lines file to write
+
+CHUNK_SIZE = 1 << 20
+
+def iterJsonLines(f):
+    """ Yield the vote on every non blank line of the open file f
+    """
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def iterJsonArray(f, chunkSize=CHUNK_SIZE):
+    """ Yield the elements of the json array in the open file f one at a time, only keeping about chunkSize characters of it in memory
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    eof = False
+    while not finished:
+        # skip the whitespace and commas between elements, and the opening bracket
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or (buffer[pos] == "[" and not started)):
+            started = started or buffer[pos] == "["
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            finished = True
+            continue
+        if pos < len(buffer):
+            try:
+                element, pos = decoder.raw_decode(buffer, pos)
+                yield element
+                continue
+            except json.JSONDecodeError:
+                # the element was cut off at the end of the buffer, unless there's nothing left to read
+                if eof:
+                    raise
+        elif eof:
+            raise ValueError("json array ended before its closing bracket")
+
+        chunk = f.read(chunkSize)
+        eof = chunk == ""
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+def iterVotes(path):
+    """ Yield every vote in the vote summary file at path, which can be JSON Lines or a single json array
+        The format is decided by the first character of the file, so the file extension doesn't matter
+    """
+    with open(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from iterJsonArray(f)
+        else:
+            yield from iterJsonLines(f)
+
+class VoteWriter(object):
+    """
+    Writes votes to a JSON Lines file as they are appended, so it can be handed to anything that appends votes to a list
+    (like the voteSummaries argument of the readers) without the votes being kept in memory
+    The votes go to a temporary file that only replaces the file at path once it's closed, so a run that fails part way
+    never leaves a truncated file behind. Used in a with block, the temporary file is thrown away if the block raises
+    """
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path + ".tmp", "w")
+        self.numVotes = 0
+
+    def append(self, vote):
+        self.f.write(json.dumps(vote) + "\n")
+        self.numVotes += 1
+
+    def close(self):
+        """ Finish writing, and move the file into place
+        """
+        if not self.f.closed:
+            self.f.close()
+            replace(self.path + ".tmp", self.path)
+
+    def discard(self):
+        """ Stop writing, and remove what was written so far
+        """
+        if not self.f.closed:
+            self.f.close()
+            remove(self.path + ".tmp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, *args):
+        if excType is None:
+            self.close()
+        else:
+            self.discard()
+
+def writeVotes(votes, path):
+    """ Write every vote in votes (any iterable) to a JSON Lines file at path, returning how many were written
+    """
+    with VoteWriter(path) as writer:
+        for vote in votes:
+            writer.append(vote)
+    return writer.numVotes
+
+if __name__ == "__main__":
+    print("wrote %d votes" % writeVotes(iterVotes(sys.argv[1]), sys.argv[2]))